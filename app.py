@@ -1,33 +1,96 @@
-from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, session, abort
 import cv2
+import multiprocessing
+import secrets
 import random, time
 import sys
 sys.path.append("src")
-from src.dance import DanceManager, sse_messages
+from src.dance import DanceManager, find_pattern_dance_file, create_dance_from_data_file
+from src.pattern_cache import PatternCache
+from src.constants import PATTERN_DANCE_DATA_PATH, MODEL_PATHS, LIVE_MODEL_TIER, CALIBRATION_DEADLINE, DANCE_JOB_TIMEOUT_MARGIN,\
+    POSE_WORKER_MAX_FRAME_SHAPE
+from src.adaptive_model import choose_model_tier
+from src.frame_broadcaster import FrameBroadcaster
+from src.mjpeg_streamer import MJPEGStreamer
+from src.inference_scheduler import InferenceScheduler, create_image_pose_estimator
+from src.session_manager import SessionManager
+from src.job_runner import JobRunner
+from src.event_bus import format_sse
 app = Flask(__name__)
-
-pattern_dance_path = None
-video_capture = cv2.VideoCapture(0)  # 0 for default camera (you can specify other camera indexes or video files)
-
-dance_manager = DanceManager(video_capture)
+app.secret_key = secrets.token_hex()
+
+# pose worker processes are spawned, so they import this module again; they must not take the camera or start threads
+is_main_process = multiprocessing.parent_process() is None
+
+video_capture = cv2.VideoCapture(0) if is_main_process else None  # 0 for default camera (you can specify other camera indexes or video files)
+frame_broadcaster = FrameBroadcaster(video_capture, open_camera=lambda: cv2.VideoCapture(0))
+if is_main_process:
+    frame_broadcaster.start()
+mjpeg_streamer = MJPEGStreamer(frame_broadcaster)
+
+pattern_cache = PatternCache(create_dance_from_data_file)
+if is_main_process:
+    pattern_cache.preload(PATTERN_DANCE_DATA_PATH)
+live_model_path = MODEL_PATHS[choose_model_tier(LIVE_MODEL_TIER)]
+# frames are never bigger than the camera's, so worker processes reserve shared memory for them up front
+max_frame_shape = frame_broadcaster.frame_shape or POSE_WORKER_MAX_FRAME_SHAPE
+inference_scheduler = InferenceScheduler(lambda: create_image_pose_estimator(live_model_path, max_frame_shape=max_frame_shape))\
+    if is_main_process else None
+session_manager = SessionManager(lambda pose_estimator: DanceManager(frame_broadcaster.subscribe(), pattern_cache, pose_estimator),
+                                 inference_scheduler)
+job_runner = JobRunner()
+
+def get_dance_session():
+    """Returns dance session of the client, which sent current request. Creates it on first use.
+    """
+    dance_session = session_manager.get(session.get('dance_session_id'))
+    if dance_session is None:
+        try:
+            dance_session = session_manager.create()
+        except RuntimeError as error:
+            abort(503, str(error))
+        session['dance_session_id'] = dance_session.id
+    return dance_session
+
+def start_dance_job(dance_session):
+    """Starts comparing dances of the session in background. Returns the job,
+    or None if the session has already a running job.
+    """
+    dance_manager = dance_session.dance_manager
+    pattern_dance_path = dance_session.pattern_dance_path
+    # dance ends with its pattern, so the job is cancelled only if it runs much longer than that
+    timeout = None
+    if pattern_dance_path:
+        timeout = pattern_cache.get(pattern_dance_path).timestamps[-1] + DANCE_JOB_TIMEOUT_MARGIN
+    with dance_session.job_lock:
+        if dance_session.job and not dance_session.job.is_done:
+            return None
+        dance_session.job = job_runner.submit(
+            "compare_dances", lambda cancel_event: dance_manager.compare_dances(pattern_dance_path, cancel_event=cancel_event),
+            timeout=timeout)
+        return dance_session.job
+
+def start_calibration_job(dance_session):
+    """Starts camera check of the session in background. Returns the job,
+    or None if the session has already a running job.
+    """
+    dance_manager = dance_session.dance_manager
+    with dance_session.job_lock:
+        if dance_session.job and not dance_session.job.is_done:
+            return None
+        dance_session.job = job_runner.submit(
+            "check_camera", lambda cancel_event: dance_manager.check_camera(message_time, cancel_event, CALIBRATION_DEADLINE),
+            timeout=CALIBRATION_DEADLINE + 5)
+        return dance_session.job
+
+def stop_dance_job(dance_session):
+    with dance_session.job_lock:
+        if dance_session.job:
+            dance_session.job.cancel()
+        dance_session.dance_manager.set_flag_is_video_being_played(False)
 
 message_time = 3
 
-def generate_frames():
-    while True:
-        success, frame = video_capture.read()
-        if not success:
-            break
-        else:
-            frame = cv2.flip(frame, 1)
-
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if not ret:
-                break
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -48,42 +111,83 @@ def calibrate_page():
 def video_started():
     data = request.get_json()
     message = data.get('message', 'No message received')
+    dance_session = get_dance_session()
     if message == "!VIDEO_START":
-        dance_manager.compare_dances(pattern_dance_path)
+        start_dance_job(dance_session)
     if message == "!VIDEO_END":
-        dance_manager.set_flag_is_video_being_played(False)
+        stop_dance_job(dance_session)
     print(f"Received message from the client: {message}")
     # Perform any additional actions you need here
     return jsonify(success=True)
 
+@app.route('/dance_job/start', methods=['POST'])
+def dance_job_start():
+    dance_session = get_dance_session()
+    if not dance_session.pattern_dance_path:
+        return jsonify(success=False, error="No dance was chosen"), 400
+    job = start_dance_job(dance_session)
+    if job is None:
+        return jsonify(success=False, error="Dance is already being compared", job=dance_session.job.to_dict()), 409
+    return jsonify(success=True, job=job.to_dict())
+
+@app.route('/dance_job/stop', methods=['POST'])
+def dance_job_stop():
+    dance_session = get_dance_session()
+    stop_dance_job(dance_session)
+    return jsonify(success=True, job=dance_session.job.to_dict() if dance_session.job else None)
+
+@app.route('/dance_job/status')
+def dance_job_status():
+    dance_session = get_dance_session()
+    return jsonify(job=dance_session.job.to_dict() if dance_session.job else None)
+
 @app.route('/get_dance_name', methods=['POST'])
 def get_dance_name():
     data = request.get_json()
     clicked_item = data.get('clickedItem')
-    global pattern_dance_path
-    pattern_dance_path = f"static/data/pattern_dance_data/{clicked_item}.csv"
+    dance_session = get_dance_session()
+    dance_session.pattern_dance_path = find_pattern_dance_file(clicked_item)
+    pattern_cache.warm(dance_session.pattern_dance_path)
     return jsonify(success=True)
 
 
 @app.route('/point_stream')
 def sse_stream():
-    def generate():
-        while True:
-            if sse_messages:
-                yield f"data: {sse_messages.pop(0)}\n\n"
-            time.sleep(3)
+    subscription = get_dance_session().dance_manager.event_bus.subscribe()
+    return Response(subscription.stream(), content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-    return Response(generate(), content_type='text/event-stream')
+@app.route('/landmark_stream')
+def landmark_stream():
+    dance_manager = get_dance_session().dance_manager
+    subscription = dance_manager.landmark_bus.subscribe()
+    return Response(dance_manager.landmark_encoder.stream(subscription), mimetype='application/octet-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 @app.route('/webcam_stream')
 def video_feed():
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(mjpeg_streamer.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/calibration_ok_message')
 def calibration_ok_msg():
-    dance_manager.set_flag_is_camera_checked(False)
-    dance_manager.check_camera(3)
-    return Response(f"data: !CALIBRATION_OK\n\n", content_type='text/event-stream')
+    dance_session = get_dance_session()
+    # subscribed before the job starts, so that its first events are not missed
+    subscription = dance_session.dance_manager.event_bus.subscribe()
+    job = start_calibration_job(dance_session)
+    if job is None:
+        # session is already dancing or calibrating, so no result would ever come to this stream
+        subscription.close()
+        return Response(format_sse("!CALIBRATION_BUSY", "calibration_result"), content_type='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+
+    def generate():
+        try:
+            yield from subscription.stream()
+        finally:
+            # calibration is not needed when nobody waits for it
+            if job:
+                job.cancel()
+
+    return Response(generate(), content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+from collections import deque
+from constants import MODEL_PATHS, MODEL_TIERS, INPUT_SCALES, TARGET_FRAME_RATE, ADAPTIVE_LATENCY_WINDOW
+
+
+def get_available_model_tiers(tiers=MODEL_TIERS):
+    """Returns tiers, whose model files exist, from the lightest to the heaviest.
+    """
+    return [tier for tier in tiers if os.path.exists(MODEL_PATHS[tier])]
+
+
+def choose_model_tier(preferred: str, tiers=MODEL_TIERS) -> str:
+    """Returns preferred tier if its model file exists, otherwise the closest available tier.
+    If no model file exists, returns preferred tier.
+    """
+    available = get_available_model_tiers(tiers)
+    if preferred in available or not available:
+        return preferred
+    preferred_index = tiers.index(preferred)
+    return min(available, key=lambda tier: abs(tiers.index(tier) - preferred_index))
+
+
+class AdaptiveModelController:
+    def __init__(self, tier: str, target_frame_rate=TARGET_FRAME_RATE, tiers=None, scales=INPUT_SCALES,
+                 window=ADAPTIVE_LATENCY_WINDOW, report=print) -> None:
+        """A class which chooses model tier and input resolution of live pose estimation, so that it keeps up with
+        target frame rate. It measures rolling mean of inference latency. When estimation is too slow,
+        it first switches to a lighter model, and then lowers input resolution. When there is a lot of headroom,
+        it restores resolution first, and then switches to a heavier model.
+        Switching tiers only takes effect in a DanceManager which owns its landmarker. A DanceManager given a shared
+        pose_estimator (e.g. of InferenceScheduler in the web app) gets a controller with a single tier,
+        so only input resolution adapts there.
+
+        Args:
+            tier (str): Initial model tier, one of tiers.
+            target_frame_rate (float, optional): Frame rate to hold. Defaults to TARGET_FRAME_RATE.
+            tiers (List[str], optional): Model tiers from the lightest to the heaviest.
+            Defaults to tiers whose model files exist.
+            scales (List[float], optional): Input resolution scales from the biggest to the smallest. Defaults to INPUT_SCALES.
+            window (int, optional): Number of measurements in rolling mean. Defaults to ADAPTIVE_LATENCY_WINDOW.
+            report (Callable[[str], None], optional): Called with a description of every switch. Defaults to print.
+        """
+        self._tiers = list(tiers) if tiers is not None else get_available_model_tiers()
+        if tier not in self._tiers:
+            raise ValueError(f"Model tier {tier} is not available. Available tiers: {self._tiers}")
+        self._tier_index = self._tiers.index(tier)
+        self._scales = list(scales)
+        self._scale_index = 0
+        self._budget = 1 / target_frame_rate
+        self._latencies = deque(maxlen=window)
+        self._report = report
+
+    @property
+    def tier(self) -> str:
+        return self._tiers[self._tier_index]
+
+    @property
+    def model_path(self) -> str:
+        return MODEL_PATHS[self.tier]
+
+    @property
+    def scale(self) -> float:
+        """Returns a factor, by which frames should be resized before estimation.
+        """
+        return self._scales[self._scale_index]
+
+    @property
+    def mean_latency(self) -> float:
+        return sum(self._latencies) / len(self._latencies) if self._latencies else 0
+
+    def record(self, latency: float) -> bool:
+        """Adds a measured inference latency (in seconds). Returns True if tier or scale was switched.
+        Decisions are made only on full window, which is cleared after every switch.
+        """
+        self._latencies.append(latency)
+        if len(self._latencies) < self._latencies.maxlen:
+            return False
+
+        mean_latency = self.mean_latency
+        previous = (self.tier, self.scale)
+        if mean_latency > self._budget:
+            if self._tier_index > 0:
+                self._tier_index -= 1
+            elif self._scale_index < len(self._scales) - 1:
+                self._scale_index += 1
+        elif mean_latency < self._budget / 2:
+            if self._scale_index > 0:
+                self._scale_index -= 1
+            elif self._tier_index < len(self._tiers) - 1:
+                self._tier_index += 1
+
+        if (self.tier, self.scale) == previous:
+            return False
+        self._latencies.clear()
+        self._report(f"Pose estimation: mean latency {mean_latency * 1000:.0f} ms for {1000 * self._budget:.0f} ms budget, "
+                     f"switched from {previous[0]} model at {previous[1]:.2f} scale "
+                     f"to {self.tier} model at {self.scale:.2f} scale")
+        return True
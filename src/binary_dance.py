@@ -0,0 +1,77 @@
+import json
+import struct
+import numpy as np
+
+BINARY_DANCE_MAGIC = b"DANCEBIN"
+BINARY_DANCE_VERSION = 1
+BINARY_DANCE_EXTENSION = ".dance"
+_ALIGNMENT = 64
+
+
+def is_binary_dance_file(path: str) -> bool:
+    """Returns True if file starts with binary dance header.
+    """
+    with open(path, "rb") as handle:
+        return handle.read(len(BINARY_DANCE_MAGIC)) == BINARY_DANCE_MAGIC
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_binary_dance_file(dance, path: str):
+    """Saves dance in binary format: magic bytes, length of JSON header, JSON header,
+    and then raw float64 timestamps and float32 (frames, nodes, 3) coordinates, both aligned to 64 bytes.
+
+    Args:
+        dance (Dance): Dance to save.
+        path (str): Path of created file.
+    """
+    timestamps = np.ascontiguousarray(dance.timestamps, dtype="<f8")
+    positions = np.ascontiguousarray(dance.positions, dtype="<f4")
+    header = {
+        "version": BINARY_DANCE_VERSION,
+        "name": dance.name,
+        "node_ids": list(dance.node_ids),
+        "frames": len(timestamps),
+    }
+    # offsets depend on the header length, so the header is measured with placeholders first
+    header["timestamps_offset"] = header["positions_offset"] = 0
+    header_length = len(json.dumps(header).encode()) + 32
+    prefix_length = len(BINARY_DANCE_MAGIC) + 4 + header_length
+    header["timestamps_offset"] = _align(prefix_length)
+    header["positions_offset"] = _align(header["timestamps_offset"] + timestamps.nbytes)
+    header_bytes = json.dumps(header).encode().ljust(header_length)
+
+    with open(path, "wb") as handle:
+        handle.write(BINARY_DANCE_MAGIC)
+        handle.write(struct.pack("<I", header_length))
+        handle.write(header_bytes)
+        handle.seek(header["timestamps_offset"])
+        handle.write(timestamps.tobytes())
+        handle.seek(header["positions_offset"])
+        handle.write(positions.tobytes())
+
+
+def read_binary_dance_file(path: str):
+    """Opens binary dance file. Coordinates and timestamps are memory-mapped, not read,
+    so opening takes the same time for every length of dance.
+
+    Returns:
+        Tuple[dict, numpy.memmap, numpy.memmap]: Header, timestamps and coordinates.
+    """
+    with open(path, "rb") as handle:
+        if handle.read(len(BINARY_DANCE_MAGIC)) != BINARY_DANCE_MAGIC:
+            raise ValueError(f"{path} is not a binary dance file.")
+        header_length, = struct.unpack("<I", handle.read(4))
+        header = json.loads(handle.read(header_length))
+    if header["version"] != BINARY_DANCE_VERSION:
+        raise ValueError(f"Unsupported binary dance version: {header['version']}")
+
+    frames = header["frames"]
+    if not frames:
+        return header, np.empty(0, dtype=np.float64), np.empty((0, len(header["node_ids"]), 3), dtype=np.float32)
+    timestamps = np.memmap(path, dtype="<f8", mode="r", offset=header["timestamps_offset"], shape=(frames,))
+    positions = np.memmap(path, dtype="<f4", mode="r", offset=header["positions_offset"],
+                          shape=(frames, len(header["node_ids"]), 3))
+    return header, timestamps, positions
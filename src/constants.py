@@ -1,10 +1,65 @@
+import os
 LEFT_ANCHOR_CREATOR_NODE = 23
 RIGHT_ANCHOR_CREATOR_NODE = 24
-MODEL_PATH = "src/pose_landmarker_heavy.task"
+MODEL_TIERS = ["lite", "full", "heavy"]
+MODEL_PATHS = {
+    "lite": "src/pose_landmarker_lite.task",
+    "full": "src/pose_landmarker_full.task",
+    "heavy": "src/pose_landmarker_heavy.task",
+}
+MODEL_PATH = MODEL_PATHS["heavy"]
+EXTRACTION_MODEL_TIER = "heavy"
+# live estimation of a shared InferenceScheduler stays on this tier, only standalone DanceManagers switch tiers
+LIVE_MODEL_TIER = "full"
 SKELETON_FILE = "src/skeleton.csv"
 DEFAULT_PROJECTION = "2D"
 DEFAULT_CHECKING_CAMERA_TIME = 3
 DEFAULT_SCORING_TIMESTEP = 3
+PATTERN_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PIPELINE_QUEUE_SIZE = 1
+PIPELINE_POLL_INTERVAL = 0.1
+SCORE_HISTORY_SIZE = 1024
+ACTUAL_DANCE_FRAME_RATE = 30
+USE_POSE_WORKER_PROCESS = False
+POSE_WORKER_SLOTS = 2
+POSE_WORKER_POLL_INTERVAL = 1
+POSE_WORKER_MAX_FRAME_SHAPE = (1080, 1920, 3)
+LIVE_RUNNING_MODE = "LIVE_STREAM"
+EXTRACTION_RUNNING_MODE = "VIDEO"
+LIVE_STREAM_RESULT_TIMEOUT = 1
+TARGET_FRAME_RATE = 15
+INPUT_SCALES = [1.0, 0.75, 0.5]
+ADAPTIVE_LATENCY_WINDOW = 30
+FRAME_BUFFER_SIZE = 4
+FRAME_READ_TIMEOUT = 1
+CAMERA_RETRY_INTERVAL = 0.05
+CAMERA_MAX_RETRY_INTERVAL = 2
+CAMERA_REOPEN_FAILURES = 5
+MJPEG_QUALITY = 70
+MJPEG_MAX_WIDTH = 640
+MJPEG_MAX_HEIGHT = 480
+MJPEG_MAX_FPS = 15
+EVENT_QUEUE_SIZE = 32
+EVENT_HEARTBEAT_INTERVAL = 15
+LANDMARK_STREAM_DTYPE = "float16"
+INFERENCE_WORKERS = 2
+MAX_SESSIONS = 4
+SESSION_IDLE_TIMEOUT = 30 * 60
+MAX_JOBS = MAX_SESSIONS
+JOB_TIMEOUT = 15 * 60
+DANCE_JOB_TIMEOUT_MARGIN = 60
+CALIBRATION_MODEL_TIER = "lite"
+CALIBRATION_FRAME_WIDTH = 320
+CALIBRATION_FRAME_RATE = 5
+CALIBRATION_DEADLINE = 60
+EXTRACTION_WORKERS = max((os.cpu_count() or 1) - 1, 1)
+EXTRACTION_CHUNK_FRAMES = 300
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+EXTRACTION_SAMPLE_RATE = 15
+RESAMPLE_MAX_GAP = 0.5
+RECORDER_FLUSH_FRAMES = 64
+RECORDER_FLUSH_INTERVAL = 1.0
+RECORDER_COMPRESSION = True
 
 DANCE_VIDEOS_PATH = "static/data/dance_videos"
 PATTERN_DANCE_DATA_PATH = "static/data/pattern_dance_data"
@@ -1,618 +1,1074 @@
-from skeleton import Skeleton
-from typing import List
-from pose_estimation import estaminate_from_frame, create_skeleton_from_raw_pose_landmarks, reverse_dictionary
-from data_writer import write_data_to_csv_file
-from constants import NODES_NAME, SKELETON_FILE, DEFAULT_PROJECTION, ACTUAL_DANCE_DATA_PATH, DEFAULT_SCORING_TIMESTEP
-from datetime import datetime
-import cv2
-import csv
-import math
-import time
-import numpy
-import matplotlib.pyplot as plt
-import os
-
-sse_messages = []
-
-class Dance:
-    def __init__(self, skeleton_table: List[Skeleton], name="") -> None:
-        """A class which represents a dance, as a list of Skeletons created in time.
-        This class can be created by complete list of Skeletons, but it also can be created without initial data, which
-        can be added after creating an intance of this class.
-        Args:
-            skeleton_table (List[Skeleton]): Initial list of Skeletons, representing a dance.
-            name (str, optional): @TODO do name
-        """
-        self._skeleton_table = skeleton_table
-        self._name = name
-
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def skeleton_table(self) -> List[Skeleton]:
-        return self._skeleton_table
-
-    def get_skeleton_by_timestamp(self, timestamp) -> Skeleton:
-        """Returns a Skeleton, which has a timestamp closest to a timestamp given as an argument.
-        """
-        return min(self._skeleton_table, key= lambda x: abs(x.timestamp-timestamp))
-
-    def add_skeleton(self, skeleton: Skeleton):
-        """Add a new Skeleton to list of Skeletons.
-        Skeleton can be added only if it wasn't in the list before.
-        """
-        if skeleton not in self.skeleton_table:
-            self._skeleton_table.append(skeleton)
-            self._skeleton_table.sort()
-
-    def get_last_skeleton(self) -> Skeleton:
-        """Returns a Skeleton, which has the biggest timestamp from all Skeletons in this Dance.
-        Returns None if there isn't any Skeleon in this list.
-        """
-        return self._skeleton_table[-1] if self._skeleton_table else None
-
-
-class DanceManager:
-    def __init__(self, camera: cv2.VideoCapture) -> None:
-        """A class which main purpose is to comepare dance from dance_data_path
-        to a data gathered by the camera.
-
-        Args:
-            pattern_dance (Dance): A Dance class object, which contain data about dance from file dance_wideo_path.
-            camera (cv2.VideoCapture): Object representing camera, from which we can get live video with dance.
-        """
-
-        self._actual_dance = Dance([])
-        self._camera = camera
-        self._displayer_timestamp = 0
-        self._is_video_being_played = False
-        self._is_camera_checked = False
-
-    @property
-    def pattern_dance(self) -> Dance:
-        """Returns a Dance object with data about dance from video
-        """
-        return self._pattern_dance
-
-    @property
-    def actual_dance(self) -> Dance:
-        """Returns a Dance object with data about dance from camera
-        """
-        return self._actual_dance
-
-    @property
-    def dance_data_path(self) -> str:
-        return self._dance_data_path
-
-    @property
-    def camera(self) -> cv2.VideoCapture:
-        return self._camera
-
-    @property
-    def displayer_timestamp(self) -> float:
-        """Returns a number which describes the current time of video
-        """
-        return self._displayer_timestamp
-
-    @property
-    def is_video_being_played(self):
-        """returs True if viedo about dance is being played
-        """
-        return self._is_video_being_played
-
-    @property
-    def is_camera_checked(self):
-        return self._is_camera_checked
-
-    def set_flag_is_video_being_played(self, value: bool):
-        self._is_video_being_played = value
-
-    def set_flag_is_camera_checked(self, value: bool):
-        self._is_camera_checked = value
-
-    def set_displayer_timestamp(self, value: float):
-        self._displayer_timestamp = value
-
-    def check_camera(self, checking_time):
-        time_start = time.time()
-        current_time = time.time()
-        while current_time < time_start + checking_time:
-            ret, frame = self.camera.read()
-            if not ret:
-                #Singal that camera could not be found
-                time_start = time.time()
-            imgRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = estaminate_from_frame(imgRGB)
-            skeleton = create_skeleton_from_raw_pose_landmarks(result.pose_world_landmarks, self.displayer_timestamp, DEFAULT_PROJECTION)
-            if not skeleton:
-                #Singal that person could not be found on camera
-                time_start = time.time()
-            current_time = time.time()
-
-        self.set_flag_is_camera_checked(True)
-
-
-    def compare_dances(self, dance_data_path: str, timestep= DEFAULT_SCORING_TIMESTEP,
-                       save_actual_dance = True, dimension = DEFAULT_PROJECTION):
-        """A method, which continuously compares dances while viedo is being played.
-        """
-        global sse_messages
-
-        self._dance_data_path = dance_data_path
-        self._pattern_dance = create_dance_from_data_file(dance_data_path)
-        self._is_video_being_played = True
-        start_time = time.time()
-        video_length = self.pattern_dance.get_last_skeleton().timestamp
-        self._actual_dance = Dance([], name=self.pattern_dance.name)
-        self.set_displayer_timestamp(0)
-
-        values = []
-        inv_values =[]
-        base_values = []
-        t = []
-        t_0 = start_time
-        value_record = []
-        depth = 0.5
-        n = 10
-        radius = numpy.linspace(0,-depth,n)
-
-        while self._is_video_being_played and self.displayer_timestamp < video_length:
-            ret, frame = self.camera.read()
-            imgRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = estaminate_from_frame(imgRGB)
-            self.set_displayer_timestamp(time.time() - start_time)
-            skeleton = create_skeleton_from_raw_pose_landmarks(result.pose_world_landmarks, self.displayer_timestamp, dimension)
-            self.actual_dance.add_skeleton(skeleton)
-
-            results = []
-
-            for delay in radius:
-                res = self._compare_recent_dance(delay)
-                if res:
-                    score,output = res
-                    #print(res)
-                    #results.append(score)
-                    if score != None:
-                        results.append((score,output))
-
-            # if not results:
-            #     print("check2")
-            results = getNthTupleElementFromList(results, 0)#strip the second elements of tuples from the list (output)
-            values.append(min(results))
-            inv_values.append(max(results))
-            base_values.append(results[0])
-
-            t.append(self._displayer_timestamp)
-            #print(f"time: {self._displayer_timestamp}, score:{min(results)}, inv_score{max(results)}")
-            #print(f"{self.displayer_timestamp} t_0: {t_0}")
-            if (time.time() - t_0) >= timestep:#when we output the result
-                t_0 = time.time()
-                values = getNthTupleElementFromList(values, 0)
-                # value_record.extend(values)
-                avg_value = sum(values)/len(values)
-                # report is what we want the user to see, here we print it
-                # report = getGrade(avg_value)
-                sse_messages.append(avg_value)
-                # print(report)
-
-                values.clear()
-
-            if not ret:
-                #Something is wrong with camera
-                break
-
-        if save_actual_dance:
-            self.save_actual_dance()
-
-    def save_actual_dance(self, file_name=None):
-        """Sace dance form camera as a csv file named file_name.
-        """
-        if not file_name:
-            file_name = f"{ACTUAL_DANCE_DATA_PATH}/{add_current_timestamp_to_filename(self.pattern_dance.name)}.csv"
-        write_data_to_csv_file(self.actual_dance, file_name, SKELETON_FILE)
-
-
-    # def _get_dance_data_from_camera(self, dimension = DEFAULT_PROJECTION):
-    #     """A method responsible gathering data from camera and updating
-    #     actual_dance Dance class object with new Skeletons bases on its data.
-    #     Method works until viedo is being played.
-
-    #     Args:
-    #         dimension (str, optional): Describes in how many dimensions should data be generated. Possible values are "2D" and "3D".
-    #         Defaults to DEFAULT_PROJECTION ("2D").
-    #     """
-
-    def _compare_recent_dance(self, delay):
-        """
-        Get the comparison of recent dance, based on gathered data from camera and data about dance from viedo.
-        """
-        last_frame = self.actual_dance.get_skeleton_by_timestamp(self.displayer_timestamp)  #Returns a Skeleton, which has the biggest timestamp from all Skeletons in this Dance. Returns None if there isn't any Skeleon in this list.
-
-        pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp - delay)#what if timestam is negative?
-
-        if not last_frame or not pattern_frame:# triggers when there is no dance data
-            #print("no last frame or pattern frame")
-            return#returns a none which causes issues in alt_dance_manager
-
-        # if isinstance(EmptySkeleton, )
-        #last_frame is the skeleton of the user
-        #pattern_frame is the skeleton generated form the video for that time instance
-
-        limbs = {#orientation from their perspective
-            #key -> [points, weight(for cumulative error)]
-            "right_arm":  [[14,12,24], 0.7],
-            "right_hand": [[16,12,24], 1],
-            "left_arm":   [[13,11,23], 0.7],
-            "left_hand":  [[15,11,23], 1],
-
-            "right_leg":  [[23,24,26], 0.2],
-            "right_foot": [[23,24,28], 0.2],
-            "left_leg":   [[24,23,25], 0.2],
-            "left_foot":  [[24,23,27], 0.2]
-            }
-
-        #practice error calculation for one limb
-        a_cos, a_sin = last_frame.get_cossin(limbs["right_arm"][0])
-        p_cos, p_sin = pattern_frame.get_cossin(limbs["right_arm"][0])
-        error_rignt_arm = min(abs(a_cos - p_cos), abs(a_sin - p_sin))
-
-        #actual error calculation for all limbs
-        error = 0
-        sum = 0
-        output = ""
-        for limb in limbs:
-            a_cos, a_sin = last_frame.get_cossin(limbs[limb][0])
-            p_cos, p_sin = pattern_frame.get_cossin(limbs[limb][0])
-            #error += min(abs(a_cos - p_cos), abs(a_sin - p_sin)) * limbs[limb][1]
-            angle = abs(math.degrees(math.acos(a_cos) - math.acos(p_cos)))
-            even = " "
-            if angle < 10:
-                even = "  "
-            elif angle >= 100:
-                even = ""
-            output += f"{limb}: {int(angle)}{even} | "
-            error += angle*limbs[limb][1]
-            sum += limbs[limb][1]# update total weight
-
-        output = f"{int(self.displayer_timestamp*1000)}ms, Res (deg): | {output}"
-        error = error/sum#adjust error for weight
-        #print(a_cos, p_cos)
-        #print(error_rignt_arm)
-        #print(error)
-        return error, output#lets plot it and see if it makes sense
-
-
-def get_dance_name_from_path(path: str):
-    file_name = os.path.basename(path)
-    file_name = file_name.split(".")[0]
-    return file_name
-
-def add_current_timestamp_to_filename(filename):
-    now = datetime.now()
-    datetime_format = "%Y-%m-%d_%H-%M-%S"
-    datetime_text = now.strftime(datetime_format)
-    new_filename = f"{filename}_{datetime_text}"
-
-    return new_filename
-
-
-def create_dance_from_data_file(data_file):
-
-    nodes_name_dict = reverse_dictionary(NODES_NAME)
-    headlines = []
-    skeleton_list = []
-    with open(data_file, "r") as handle:
-        raw_dance_data = csv.DictReader(handle, delimiter=",")
-
-        raw_headlines = raw_dance_data.fieldnames
-
-
-        for raw_headline in raw_headlines[1:]:
-            headline_name = raw_headline[:-2]
-            if headline_name not in headlines:
-                headlines.append(headline_name)
-
-        next(raw_dance_data)
-        for line in raw_dance_data:
-            current_raw_skeleton = []
-            timestamp = float(line["timestamp"])
-            n_nodes = (len(line)-1)//3
-
-            for node in range(n_nodes):
-                id = nodes_name_dict[headlines[node]]
-                x = line[raw_headlines[3*node + 1]]
-                y = line[raw_headlines[3*node + 2]]
-                z = line[raw_headlines[3*node + 3]]
-                current_raw_skeleton.append([id, x, y, z])
-            skeleton_list.append(Skeleton(current_raw_skeleton, timestamp))
-    return Dance(skeleton_list, name=get_dance_name_from_path(data_file))
-
-
-def get_dance_data_from_video(video_path, dimension = DEFAULT_PROJECTION):
-
-    data = []
-
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    current_frame = 0
-    while True:
-        success, img = cap.read()
-        if not success:
-            return Dance(data, name=get_dance_name_from_path(video_path))
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = estaminate_from_frame(imgRGB)
-        timestamp = current_frame / fps
-        skeleton = create_skeleton_from_raw_pose_landmarks(results.pose_world_landmarks, timestamp, dimension)
-        data.append(skeleton)
-        current_frame += 1
-
-def getNthTupleElementFromList(L: list, n:int):
-    #when u have a list of tuples this function will return only the n-th element of each tuple as a list
-    R = []
-    for element in L:
-        R.append(element[n])
-    return R
-
-def getGrade(score: int):
-    #returns a string name for a score you are given
-    #fell free to adjust
-    scoring_system = {
-        #!keys have to be increasing and in [0,180]
-        10: "very good",
-        30: "good",
-        50: "almost",
-        100: "are u sure you are dancing?",
-        180: "u are not good at this"
-    }
-    for limit, result in scoring_system.items():
-        if score <= limit:
-            return result + ", " + str(int((score/180)*100)) + "% pose difference"
-    return "ERROR score so terrible it was out of bounds"
-
-
-# class MockDanceManager(DanceManager):
-#     def __init__(self, pattern_dance: str, actual_dance: Dance) -> None:
-#         """Mock testing class for DanceManager.
-
-#         Args:
-#             pattern_dance (Dance): A Dance class object, which mocks data from video.
-#             actual_dance (Dance): A Dance class object, which mocks data from camera.
-#         """
-
-#         self._dance_video_path = None
-#         self._pattern_dance = pattern_dance
-#         self._actual_dance = actual_dance
-#         self._dance_displayer_thread = None
-#         self._dance_data_getter_thread = None
-#         self._displayer_timestamp = 0
-#         self._is_video_being_played = False
-
-
-
-#     # def compare_dances(self):
-#         #last_frame = self.actual_dance.get_last_skeleton()
-#         # if not last_frame:
-#         #     return
-#         # pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp)
-
-#         # for lm in last_frame.landmarks():
-#         #     landmark_id = lm.id
-#         #     patt_lm = pattern_frame.get_landmark_by_id(landmark_id)
-#         #     error = 0
-#         #     if not lm:
-#         #         #Camera could not find a person
-#         #         pass
-#         #     elif not patt_lm:
-#         #         #Person could not be found in reference video
-#         #         pass
-#         #     else:
-#         #         landmark_error = math.sqrt((lm.x - patt_lm.x)**2 + (lm.y - patt_lm.y)**2 + (lm.z - patt_lm.z)**2)
-#         #         error += landmark_error
-
-#         # print(f"{last_frame.timestamp}: {error}")
-#     #     self._is_video_being_played = True
-#     #     time_start = time.time()
-#     #     dance_time = self.pattern_dance.get_last_skeleton().timestamp
-
-#     #     values = []
-#     #     inv_values =[]
-#     #     base_values = []
-#     #     t = []
-
-#     #     while self._is_video_being_played:
-#     #         depth = 0.5
-#     #         n = 10
-#     #         radius = numpy.linspace(0,-depth,n)
-#     #         results = []
-
-#     #         for delay in radius:
-#     #             res = self.alt_compare_recent_dance(delay)
-#     #             if res:
-#     #                 score,output = res
-#     #                 #print(res)
-#     #                 #results.append(score)
-#     #                 if score != None:
-#     #                     results.append((score,output))
-
-#     #         if not results:
-#     #             print("check2")
-
-#     #         values.append(min(results))
-#     #         inv_values.append(max(results))
-#     #         base_values.append(results[0])
-
-#     #         t.append(self._displayer_timestamp)
-#     #         #print(f"time: {self._displayer_timestamp}, score:{min(results)}, inv_score{max(results)}")
-#     #         self._displayer_timestamp = time.time() - time_start
-#     #         if self._displayer_timestamp > dance_time:
-#     #             self._is_video_being_played = False
-
-#     #     #values is a list of tuples first one being score second one being output
-#     #     #so now since we dont need it we need to strip the second element form the tupels in the list
-#     #     values = getNthTupleElementFromList(values, 0)
-#     #     base_values = getNthTupleElementFromList(base_values, 0)
-#     #     inv_values = getNthTupleElementFromList(inv_values, 0)
-
-#     #     avg_value = sum(values)/len(values)
-#     #     inv_avg_value = sum(inv_values)/len(inv_values)
-#     #     avg_base = sum(base_values)/len(base_values)
-
-#     #     print(f"average score is: {avg_value}, average worst score is: {inv_avg_value}, base score is {avg_base}")
-#     #     print(f"your score is: {getGrade(avg_value)}")
-
-#     #     if len(values) == len(inv_values) == len(base_values) == len(t):
-#     #         plt.plot(t,inv_values, linewidth = 1, label = "worst")
-#     #         plt.plot(t,base_values, linewidth = 1, label = "base")
-#     #         plt.plot(t,values, linewidth = 1,label = "best")
-#     #         plt.legend()
-#     #         plt.show()
-#     #     else:
-#     #         print(f"Pyplot lists not matching {len(values)}, {len(inv_values)}, {len(base_values)}, {len(t)}")
-#     #     #PLOT THE VALUES
-
-#     def compare_dances_live(self, timestep: float):
-#         # self._is_video_being_played = True
-#         # time_start = time.time()
-#         # dance_time = self.pattern_dance.get_last_skeleton().timestamp
-
-#         # values = []
-#         # inv_values =[]
-#         # base_values = []
-#         # t = []
-#         # t_0 = time_start
-#         # value_record = []
-
-#         # while self._is_video_being_played:
-#         #     results = []
-
-#         #     for delay in radius:
-#         #         res = self.alt_compare_recent_dance(delay)
-#         #         if res:
-#         #             score,output = res
-#         #             #print(res)
-#         #             #results.append(score)
-#         #             if score != None:
-#         #                 results.append((score,output))
-
-#         #     if not results:
-#         #         print("check2")
-
-#         #     values.append(min(results))
-#         #     inv_values.append(max(results))
-#         #     base_values.append(results[0])
-
-#         #     t.append(self._displayer_timestamp)
-#         #     #print(f"time: {self._displayer_timestamp}, score:{min(results)}, inv_score{max(results)}")
-#         #     #print(f"{self.displayer_timestamp} t_0: {t_0}")
-#         #     if (time.time() - t_0) >= timestep:#when we output the result
-#         #         t_0 = time.time()
-#         #         values = getNthTupleElementFromList(values, 0)
-#         #         value_record.extend(values)
-#         #         avg_value = sum(values)/len(values)
-#         #         #report is what we want the user to see, here we print it
-#         #         report = getGrade(avg_value)
-#         #         print(report)
-
-#         #         values.clear()
-
-
-
-#         #     self._displayer_timestamp = time.time() - time_start
-#         #     if self._displayer_timestamp > dance_time:
-#         #         self._is_video_being_played = False
-
-#         #values is a list of tuples first one being score second one being output
-#         #so now since we dont need it we need to strip the second element form the tupels in the list
-#         # values = getNthTupleElementFromList(values, 0)
-#         # base_values = getNthTupleElementFromList(base_values, 0)
-#         # inv_values = getNthTupleElementFromList(inv_values, 0)
-
-#         # avg_value = sum(values)/len(values)
-#         # inv_avg_value = sum(inv_values)/len(inv_values)
-#         # avg_base = sum(base_values)/len(base_values)
-#         return
-
-
-
-#     # def _compare_recent_dance(self):
-#     #     """
-#     #     Get the comparison of recent dance, based on gathered data from camera and data about dance from viedo.
-#     #     """
-#     #     last_frame = self.actual_dance.get_skeleton_by_timestamp(self.displayer_timestamp)
-#     #     if not last_frame:
-#     #         return
-#     #     pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp)
-
-#     #     for lm in last_frame.landmarks():
-#     #         landmark_id = lm.id
-#     #         patt_lm = pattern_frame.get_landmark_by_id(landmark_id)
-#     #         error = 0
-#     #         if not lm:
-#     #             #Camera could not find a person
-#     #             pass
-#     #         elif not patt_lm:
-#     #             #Person could not be found in reference video
-#     #             pass
-#     #         else:
-#     #             landmark_error = math.sqrt((lm.x - patt_lm.x)**2 + (lm.y - patt_lm.y)**2 + (lm.z - patt_lm.z)**2)
-#     #             error += landmark_error
-
-#     #     print(f"{last_frame.timestamp}: {error}")
-
-#     def alt_compare_recent_dance(self, delay) -> float:#delay can be set to account dancers dealy
-#         last_frame = self.actual_dance.get_skeleton_by_timestamp(self.displayer_timestamp)  #Returns a Skeleton, which has the biggest timestamp from all Skeletons in this Dance. Returns None if there isn't any Skeleon in this list.
-
-#         pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp - delay)#what if timestam is negative?
-
-#         if not last_frame or not pattern_frame:# triggers when there is no dance data
-#             #print("no last frame or pattern frame")
-#             return#returns a none which causes issues in alt_dance_manager
-
-#         # if isinstance(EmptySkeleton, )
-#         #last_frame is the skeleton of the user
-#         #pattern_frame is the skeleton generated form the video for that time instance
-
-#         limbs = {#orientation from their perspective
-#             #key -> [points, weight(for cumulative error)]
-#             "right_arm":  [[14,12,24], 0.7],
-#             "right_hand": [[16,12,24], 1],
-#             "left_arm":   [[13,11,23], 0.7],
-#             "left_hand":  [[15,11,23], 1],
-
-#             "right_leg":  [[23,24,26], 0.2],
-#             "right_foot": [[23,24,28], 0.2],
-#             "left_leg":   [[24,23,25], 0.2],
-#             "left_foot":  [[24,23,27], 0.2]
-#             }
-
-#         #practice error calculation for one limb
-#         a_cos, a_sin = last_frame.get_cossin(limbs["right_arm"][0])
-#         p_cos, p_sin = pattern_frame.get_cossin(limbs["right_arm"][0])
-#         error_rignt_arm = min(abs(a_cos - p_cos), abs(a_sin - p_sin))
-
-#         #actual error calculation for all limbs
-#         error = 0
-#         sum = 0
-#         output = ""
-#         for limb in limbs:
-#             a_cos, a_sin = last_frame.get_cossin(limbs[limb][0])
-#             p_cos, p_sin = pattern_frame.get_cossin(limbs[limb][0])
-#             #error += min(abs(a_cos - p_cos), abs(a_sin - p_sin)) * limbs[limb][1]
-#             angle = abs(math.degrees(math.acos(a_cos) - math.acos(p_cos)))
-#             even = " "
-#             if angle < 10:
-#                 even = "  "
-#             elif angle >= 100:
-#                 even = ""
-#             output += f"{limb}: {int(angle)}{even} | "
-#             error += angle*limbs[limb][1]
-#             sum += limbs[limb][1]# update total weight
-
-#         output = f"{int(self.displayer_timestamp*1000)}ms, Res (deg): | {output}"
-#         error = error/sum#adjust error for weight
-#         #print(a_cos, p_cos)
-#         #print(error_rignt_arm)
-#         #print(error)
-#         return error, output#lets plot it and see if it makes sense
+from skeleton import Skeleton, RawSkeleton, get_skeleton_topology
+from typing import List
+from collections.abc import Sequence
+from pose_estimation import create_skeleton_from_landmark_array, reverse_dictionary, LocalPoseEstimator
+from data_writer import write_data_to_csv_file
+from scoring import LimbScorer, FrameScore
+from pipeline import LatestQueue, PipelineStage
+from event_bus import EventBus
+from landmark_stream import LandmarkStreamEncoder
+from adaptive_model import AdaptiveModelController, choose_model_tier, get_available_model_tiers
+from binary_dance import is_binary_dance_file, read_binary_dance_file, BINARY_DANCE_EXTENSION
+from ring_buffer import RingBuffer, StreamingAggregate
+from dance_recorder import DanceRecorder, is_dance_recording_file, read_dance_recording, DANCE_RECORDING_EXTENSION
+from constants import NODES_NAME, SKELETON_FILE, DEFAULT_PROJECTION, ACTUAL_DANCE_DATA_PATH, DEFAULT_SCORING_TIMESTEP, PATTERN_DANCE_DATA_PATH,\
+    PIPELINE_QUEUE_SIZE, PIPELINE_POLL_INTERVAL, SCORE_HISTORY_SIZE, ACTUAL_DANCE_FRAME_RATE, LIVE_RUNNING_MODE, EXTRACTION_RUNNING_MODE, MODEL_PATHS, LIVE_MODEL_TIER,\
+    EXTRACTION_MODEL_TIER, RESAMPLE_MAX_GAP, CALIBRATION_MODEL_TIER, CALIBRATION_FRAME_WIDTH, CALIBRATION_FRAME_RATE, CALIBRATION_DEADLINE
+from datetime import datetime
+import cv2
+import csv
+import io
+import json
+import math
+import threading
+import warnings
+import time
+import numpy
+import matplotlib.pyplot as plt
+import os
+
+# record of DanceManager.score_history
+SCORE_HISTORY_DTYPE = [("timestamp", numpy.float64), ("best", numpy.float64), ("worst", numpy.float64), ("base", numpy.float64)]
+
+class SkeletonTableView(Sequence):
+    def __init__(self, dance) -> None:
+        """Read-only, list-like view of a Dance, which creates Skeleton objects only when they are accessed.
+        It lets code written for a list of Skeletons work with the columnar storage of Dance.
+
+        Args:
+            dance (Dance): Dance whose frames are viewed.
+        """
+        self._dance = dance
+
+    def __len__(self) -> int:
+        return len(self._dance)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._dance.get_skeleton(i) for i in range(*index.indices(len(self)))]
+        return self._dance.get_skeleton(index)
+
+
+class Dance:
+    def __init__(self, skeleton_table: List[Skeleton], name="", node_ids=None, capacity=0) -> None:
+        """A class which represents a dance, as a sequence of poses created in time.
+        Poses are stored column-wise: a vector of timestamps, a (frames, nodes, 3) float32 array of
+        normalized coordinates and a mask telling which frames contain a complete pose.
+        Missing coordinates are stored as NaN.
+        This class can be created by complete list of Skeletons, but it also can be created without initial data, which
+        can be added after creating an intance of this class.
+        Args:
+            skeleton_table (List[Skeleton]): Initial list of Skeletons, representing a dance.
+            name (str, optional): @TODO do name
+            node_ids (List[int], optional): Ids of stored Landmarks, in order of columns.
+            Defaults to every non-anchor node of SKELETON_FILE.
+            capacity (int, optional): Number of frames, for which storage is allocated up front,
+            so that adding them never reallocates. Defaults to 0.
+        """
+        self._name = name
+        self._node_ids = tuple(node_ids) if node_ids is not None else get_skeleton_topology(SKELETON_FILE).node_ids
+        self._node_index = {id: index for index, id in enumerate(self._node_ids)}
+
+        rows = [self._skeleton_to_row(skeleton) for skeleton in skeleton_table]
+        timestamps = [skeleton.timestamp for skeleton in skeleton_table]
+        positions = numpy.array(rows, dtype=numpy.float32).reshape(len(rows), len(self._node_ids), 3)
+        self._set_frames(numpy.array(timestamps, dtype=numpy.float64), positions)
+        self._reserve(capacity)
+
+    @classmethod
+    def from_arrays(cls, timestamps, positions, node_ids, name="") -> "Dance":
+        """Creates a Dance directly from columnar data, without creating any Skeleton objects.
+
+        Args:
+            timestamps (numpy.ndarray): Vector of timestamps, one for every frame.
+            positions (numpy.ndarray): Array of shape (frames, len(node_ids), 3) with normalized coordinates.
+            node_ids (List[int]): Ids of Landmarks, in order of columns of positions.
+            name (str, optional): Name of the dance.
+        """
+        dance = cls([], name=name, node_ids=node_ids)
+        dance._set_frames(numpy.asarray(timestamps, dtype=numpy.float64),
+                          numpy.asarray(positions, dtype=numpy.float32))
+        return dance
+
+    def _set_frames(self, timestamps, positions):
+        order = numpy.argsort(timestamps, kind="stable")
+        if numpy.any(order != numpy.arange(len(order))):
+            timestamps = timestamps[order]
+            positions = positions[order]
+        self._timestamps = timestamps
+        self._positions = positions
+        self._valid = ~numpy.isnan(positions).any(axis=(1, 2))
+        self._size = len(timestamps)
+        self._frame_step = self._uniform_step(timestamps)
+        self._limb_angles = None
+
+    @staticmethod
+    def _uniform_step(timestamps):
+        """Returns the step between timestamps, if they make a uniform grid, and None otherwise.
+        """
+        if len(timestamps) < 2:
+            return None
+        step = (timestamps[-1] - timestamps[0]) / (len(timestamps) - 1)
+        if step <= 0 or numpy.abs(numpy.diff(timestamps) - step).max() > step * 1e-6:
+            return None
+        return float(step)
+
+    def _reserve(self, capacity: int):
+        """Makes sure that the storage can hold capacity frames, growing it geometrically,
+        so that appending frames one by one has amortised constant cost.
+        Data is always copied into new buffers, so arrays given to from_arrays are never modified.
+        """
+        if capacity <= len(self._timestamps):
+            return
+        capacity = max(capacity, 2 * len(self._timestamps), 64)
+        timestamps = numpy.empty(capacity, dtype=numpy.float64)
+        positions = numpy.empty((capacity, len(self._node_ids), 3), dtype=numpy.float32)
+        valid = numpy.zeros(capacity, dtype=bool)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        positions[:self._size] = self._positions[:self._size]
+        valid[:self._size] = self._valid[:self._size]
+        self._timestamps, self._positions, self._valid = timestamps, positions, valid
+
+    def _skeleton_to_row(self, skeleton: Skeleton):
+        if isinstance(skeleton, RawSkeleton) and skeleton.node_ids == self._node_ids:
+            return skeleton.coordinates
+        row = numpy.full((len(self._node_ids), 3), numpy.nan, dtype=numpy.float32)
+        for landmark in skeleton.landmarks():
+            index = self._node_index.get(landmark.id)
+            if index is not None and landmark:
+                row[index] = (landmark.x, landmark.y, landmark.z)
+        return row
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def node_ids(self):
+        """Returns ids of stored Landmarks, in order of columns of positions.
+        """
+        return self._node_ids
+
+    @property
+    def timestamps(self):
+        """Returns a sorted vector of timestamps of all frames.
+        """
+        return self._timestamps[:self._size]
+
+    @property
+    def frame_step(self):
+        """Returns the time between frames, if frames are on a uniform time grid (e.g. after resample), and None otherwise.
+        Frames of such Dance are found by timestamp without searching.
+        """
+        return self._frame_step
+
+    @property
+    def positions(self):
+        """Returns a (frames, nodes, 3) array of normalized coordinates. Missing coordinates are NaN.
+        """
+        return self._positions[:self._size]
+
+    @property
+    def valid(self):
+        """Returns a boolean vector, which is True for frames containing a complete pose.
+        """
+        return self._valid[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Returns number of bytes used by data of this Dance.
+        """
+        nbytes = self._timestamps.nbytes + self._positions.nbytes + self._valid.nbytes
+        if self._limb_angles is not None:
+            nbytes += self._limb_angles.nbytes
+        return nbytes
+
+    @property
+    def limb_angles(self):
+        """Returns a (frames, limbs, 3) table with cos, sin and angle of every scoring limb in every frame,
+        or None if it was not precomputed.
+        """
+        return self._limb_angles
+
+    def precompute_limb_angles(self, scorer: LimbScorer):
+        """Computes limb_angles table for all frames of this Dance, so that scoring against this Dance
+        is only a lookup. Table is dropped when a new frame is added.
+        """
+        self._limb_angles = scorer.limb_angles(self.positions).astype(numpy.float32)
+
+    @property
+    def skeleton_table(self) -> SkeletonTableView:
+        return SkeletonTableView(self)
+
+    def get_skeleton(self, index: int) -> Skeleton:
+        """Returns a Skeleton created from frame with the given index.
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Frame index out of range")
+        return Skeleton.from_coordinates(self._node_ids, self._positions[index], float(self._timestamps[index]))
+
+    def get_frame_index_by_timestamp(self, timestamp) -> int:
+        """Returns index of a frame, which has a timestamp closest to a timestamp given as an argument.
+        When two frames are equally close, the earlier one is returned.
+        Returns None if there isn't any frame in this Dance.
+        """
+        if not self._size:
+            return None
+        if self._frame_step:
+            index = math.ceil((timestamp - self._timestamps[0]) / self._frame_step - 0.5)
+            return min(max(index, 0), self._size - 1)
+        timestamps = self.timestamps
+        index = int(numpy.searchsorted(timestamps, timestamp))
+        if index == self._size:
+            return index - 1
+        if index > 0 and timestamp - timestamps[index - 1] <= timestamps[index] - timestamp:
+            return index - 1
+        return index
+
+    def get_frame_indices_by_timestamps(self, timestamps):
+        """Vectorized version of get_frame_index_by_timestamp, for an array of timestamps.
+        Dance must contain at least one frame.
+        """
+        timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+        if self._frame_step:
+            indices = numpy.ceil((timestamps - self._timestamps[0]) / self._frame_step - 0.5).astype(numpy.intp)
+            return numpy.clip(indices, 0, self._size - 1)
+        frame_timestamps = self.timestamps
+        right = numpy.clip(numpy.searchsorted(frame_timestamps, timestamps), 1, max(self._size - 1, 1))
+        left = right - 1
+        right = numpy.minimum(right, self._size - 1)
+        use_left = timestamps - frame_timestamps[left] <= frame_timestamps[right] - timestamps
+        return numpy.where(use_left, left, right)
+
+    def get_skeleton_by_timestamp(self, timestamp) -> Skeleton:
+        """Returns a Skeleton, which has a timestamp closest to a timestamp given as an argument.
+        """
+        index = self.get_frame_index_by_timestamp(timestamp)
+        return self.get_skeleton(index) if index is not None else None
+
+    def add_skeleton(self, skeleton: Skeleton):
+        """Add a new Skeleton to this Dance, keeping frames sorted by timestamp.
+        Skeleton can be added only if it wasn't in the Dance before.
+        Skeletons arriving in timestamp order are appended in amortised constant time.
+        """
+        self.add_frame(skeleton.timestamp, self._skeleton_to_row(skeleton))
+
+    def add_frame(self, timestamp: float, coordinates):
+        """Add a new frame of normalized coordinates to this Dance, keeping frames sorted by timestamp.
+        Frame can be added only if it wasn't in the Dance before.
+
+        Args:
+            timestamp (float): A number, describing in which second there was a pose.
+            coordinates (numpy.ndarray): Array of shape (nodes, 3), in order of node_ids. Missing coordinates are NaN.
+        """
+        timestamps = self.timestamps
+        index = int(numpy.searchsorted(timestamps, timestamp, side="right"))
+        tolerance = 1e-09 * abs(timestamp)
+        first_same = int(numpy.searchsorted(timestamps, timestamp - tolerance, side="left"))
+        for same in range(first_same, index):
+            if numpy.allclose(self._positions[same], coordinates, equal_nan=True):
+                return
+
+        self._reserve(self._size + 1)
+        if index < self._size:
+            self._timestamps[index + 1:self._size + 1] = self._timestamps[index:self._size]
+            self._positions[index + 1:self._size + 1] = self._positions[index:self._size]
+            self._valid[index + 1:self._size + 1] = self._valid[index:self._size]
+        self._timestamps[index] = timestamp
+        self._positions[index] = coordinates
+        self._valid[index] = not numpy.isnan(self._positions[index]).any()
+        self._size += 1
+        self._frame_step = None
+        self._limb_angles = None
+
+    def resample(self, rate: float, max_gap=RESAMPLE_MAX_GAP) -> "Dance":
+        """Returns a new Dance with frames on a uniform grid of rate frames per second, starting at the first frame.
+        Poses are linearly interpolated between the closest complete poses before and after every grid point.
+        Incomplete poses (e.g. from EmptySkeleton) are skipped, and grid points in gaps longer than max_gap seconds
+        between complete poses, or farther than max_gap / 2 from the first or last complete pose, get a missing pose.
+
+        Args:
+            rate (float): Number of frames per second of the new Dance.
+            max_gap (float, optional): Longest gap (in seconds), over which poses are interpolated. Defaults to RESAMPLE_MAX_GAP.
+        """
+        if not self._size:
+            return Dance([], name=self._name, node_ids=self._node_ids)
+        start = self._timestamps[0]
+        n_frames = int(numpy.floor((self._timestamps[self._size - 1] - start) * rate + 1e-9)) + 1
+        grid = start + numpy.arange(n_frames) / rate
+        positions = numpy.full((n_frames, len(self._node_ids), 3), numpy.nan, dtype=numpy.float32)
+
+        valid_timestamps = self.timestamps[self.valid]
+        valid_positions = self.positions[self.valid]
+        n_valid = len(valid_timestamps)
+        if n_valid:
+            right = numpy.searchsorted(valid_timestamps, grid)
+            left = right - 1
+            clipped_right = numpy.minimum(right, n_valid - 1)
+            exact = valid_timestamps[clipped_right] == grid
+
+            inner = ~exact & (left >= 0) & (right < n_valid)
+            span = valid_timestamps[clipped_right] - valid_timestamps[numpy.maximum(left, 0)]
+            inner &= span <= max_gap
+            l, r = left[inner], right[inner]
+            weight = ((grid[inner] - valid_timestamps[l]) / span[inner])[:, None, None]
+            positions[inner] = valid_positions[l] + (valid_positions[r] - valid_positions[l]) * weight
+
+            before = ~exact & (right == 0) & (valid_timestamps[0] - grid <= max_gap / 2)
+            after = ~exact & (right == n_valid) & (grid - valid_timestamps[-1] <= max_gap / 2)
+            positions[before] = valid_positions[0]
+            positions[after] = valid_positions[-1]
+            positions[exact] = valid_positions[clipped_right[exact]]
+
+        return Dance.from_arrays(grid, positions, self._node_ids, self._name)
+
+    def get_last_skeleton(self) -> Skeleton:
+        """Returns a Skeleton, which has the biggest timestamp from all Skeletons in this Dance.
+        Returns None if there isn't any Skeleon in this list.
+        """
+        return self.get_skeleton(-1) if len(self) else None
+
+
+class DanceManager:
+    def __init__(self, camera: cv2.VideoCapture, pattern_cache=None, pose_estimator=None, model_controller=None,
+                 event_bus=None, landmark_bus=None, presence_estimator=None) -> None:
+        """A class which main purpose is to comepare dance from dance_data_path
+        to a data gathered by the camera.
+
+        Args:
+            camera (cv2.VideoCapture | FrameSubscription): Object representing camera, from which we can get live video with dance.
+            pattern_cache (PatternCache, optional): Cache used to get pattern dances. If not given,
+            pattern dance is read from file every time.
+            pose_estimator (LocalPoseEstimator | ProcessPoseEstimator, optional): Object estimating landmarks
+            from frames. Defaults to LocalPoseEstimator in LIVE_RUNNING_MODE, running in the current process,
+            with model chosen by model_controller.
+            model_controller (AdaptiveModelController, optional): Controller switching model tier and input resolution
+            of live estimation to hold target frame rate. Model tier is switched only for the default pose_estimator.
+            Defaults to a controller starting from LIVE_MODEL_TIER, which only changes input resolution
+            if pose_estimator is given.
+            event_bus (EventBus, optional): Bus, to which scores are published. Defaults to a new EventBus.
+            landmark_bus (EventBus, optional): Bus, to which actual and pattern poses are published as
+            landmark stream records. Defaults to a new EventBus.
+            presence_estimator (LocalPoseEstimator | ProcessPoseEstimator, optional): Cheap estimator used by check_camera
+            to see if a person is visible. Defaults to LocalPoseEstimator with CALIBRATION_MODEL_TIER model,
+            created on first calibration.
+        """
+        self._pattern_cache = pattern_cache
+        self._owns_pose_estimator = pose_estimator is None
+        if not model_controller:
+            tier = choose_model_tier(LIVE_MODEL_TIER)
+            # model of a given estimator cannot be swapped, so only its input resolution is adapted
+            tiers = (get_available_model_tiers() or [tier]) if self._owns_pose_estimator else [tier]
+            model_controller = AdaptiveModelController(tier, tiers=tiers)
+        self._model_controller = model_controller
+        if self._owns_pose_estimator:
+            self._estimator_model_path = model_controller.model_path
+            pose_estimator = LocalPoseEstimator(LIVE_RUNNING_MODE, self._estimator_model_path)
+        self._pose_estimator = pose_estimator
+        self._event_bus = event_bus or EventBus()
+        self._landmark_bus = landmark_bus or EventBus()
+        self._landmark_encoder = LandmarkStreamEncoder(get_skeleton_topology())
+        self._owns_presence_estimator = presence_estimator is None
+        self._presence_estimator = presence_estimator
+
+        self._actual_dance = Dance([])
+        self._recording_path = None
+        self._score_history = RingBuffer(SCORE_HISTORY_SIZE, SCORE_HISTORY_DTYPE)
+        self._camera = camera
+        self._displayer_timestamp = 0
+        self._is_video_being_played = False
+        self._is_camera_checked = False
+
+    @property
+    def pattern_dance(self) -> Dance:
+        """Returns a Dance object with data about dance from video
+        """
+        return self._pattern_dance
+
+    @property
+    def actual_dance(self) -> Dance:
+        """Returns a Dance object with data about dance from camera
+        """
+        return self._actual_dance
+
+    @property
+    def event_bus(self) -> EventBus:
+        """Returns a bus, to which scores are published while dances are compared
+        """
+        return self._event_bus
+
+    @property
+    def landmark_bus(self) -> EventBus:
+        """Returns a bus, to which landmark stream records are published while dances are compared
+        """
+        return self._landmark_bus
+
+    @property
+    def landmark_encoder(self) -> LandmarkStreamEncoder:
+        return self._landmark_encoder
+
+    @property
+    def score_history(self) -> RingBuffer:
+        """Returns a ring buffer with (timestamp, best, worst, base) scores of the most recent frames
+        of the current or last dance.
+        """
+        return self._score_history
+
+    @property
+    def recording_path(self) -> str:
+        """Returns path of the file, to which the last dance from camera was recorded, or None.
+        """
+        return self._recording_path
+
+    @property
+    def dance_data_path(self) -> str:
+        return self._dance_data_path
+
+    @property
+    def camera(self) -> cv2.VideoCapture:
+        return self._camera
+
+    @property
+    def displayer_timestamp(self) -> float:
+        """Returns a number which describes the current time of video
+        """
+        return self._displayer_timestamp
+
+    @property
+    def is_video_being_played(self):
+        """returs True if viedo about dance is being played
+        """
+        return self._is_video_being_played
+
+    @property
+    def is_camera_checked(self):
+        return self._is_camera_checked
+
+    def set_flag_is_video_being_played(self, value: bool):
+        self._is_video_being_played = value
+
+    def set_flag_is_camera_checked(self, value: bool):
+        self._is_camera_checked = value
+
+    def set_displayer_timestamp(self, value: float):
+        self._displayer_timestamp = value
+
+    def close(self):
+        """Stops comparing dances, ends event streams, and releases camera and pose estimator.
+        Pose estimator given in constructor is closed too, so it must not be shared with other DanceManagers.
+        """
+        self._is_video_being_played = False
+        self._event_bus.close()
+        self._landmark_bus.close()
+        self._pose_estimator.close()
+        if self._owns_presence_estimator and self._presence_estimator:
+            self._presence_estimator.close()
+        self._camera.release()
+
+    def check_camera(self, checking_time, cancel_event: threading.Event = None, deadline=CALIBRATION_DEADLINE) -> bool:
+        """Checks if a person is visible on camera without a break for checking_time seconds.
+        Frames are downscaled to CALIBRATION_FRAME_WIDTH and checked with presence estimator
+        at most CALIBRATION_FRAME_RATE times per second, so calibration takes a small part of CPU.
+        Progress is published to event_bus as "calibration" events with JSON data, and the result
+        as "calibration_result" event with "!CALIBRATION_OK" or "!CALIBRATION_FAILED".
+        Returns True if the check passed, and False if deadline passed or cancel_event was set before.
+        """
+        if self._presence_estimator is None:
+            model_path = MODEL_PATHS[choose_model_tier(CALIBRATION_MODEL_TIER)]
+            # VIDEO mode tracks the person between frames, which is cheaper than detecting from scratch
+            self._presence_estimator = LocalPoseEstimator("VIDEO", model_path)
+        cancel_event = cancel_event or threading.Event()
+        interval = 1 / CALIBRATION_FRAME_RATE
+        self.set_flag_is_camera_checked(False)
+
+        time_start = time.time()
+        visible_since = None
+        while not cancel_event.is_set():
+            check_start = time.time()
+            if check_start - time_start > deadline:
+                break
+            ret, frame = self.camera.read()
+            person_visible = False
+            if ret:
+                height, width = frame.shape[:2]
+                if width > CALIBRATION_FRAME_WIDTH:
+                    scale = CALIBRATION_FRAME_WIDTH / width
+                    frame = cv2.resize(frame, (CALIBRATION_FRAME_WIDTH, int(height * scale)), interpolation=cv2.INTER_AREA)
+                imgRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                person_visible = self._presence_estimator.estimate(imgRGB) is not None
+            #Signal that camera or person could not be found resets the check
+            now = time.time()
+            if not person_visible:
+                visible_since = None
+            elif visible_since is None:
+                visible_since = now
+            progress = min((now - visible_since) / checking_time, 1) if visible_since is not None else 0
+            self._event_bus.publish(json.dumps({"progress": round(progress, 2), "person_visible": person_visible,
+                                                "camera_ok": bool(ret), "remaining": round(deadline - (now - time_start), 1)}),
+                                    "calibration")
+            if progress >= 1:
+                self.set_flag_is_camera_checked(True)
+                self._event_bus.publish("!CALIBRATION_OK", "calibration_result")
+                return True
+            cancel_event.wait(interval - (time.time() - check_start))
+
+        self._event_bus.publish("!CALIBRATION_FAILED", "calibration_result")
+        return False
+
+    def compare_dances(self, dance_data_path: str, timestep= DEFAULT_SCORING_TIMESTEP,
+                       save_actual_dance = True, dimension = DEFAULT_PROJECTION, cancel_event: threading.Event = None):
+        """A method, which continuously compares dances while viedo is being played.
+        Comparison ends when video ends, when is_video_being_played flag is cleared, or when cancel_event is set.
+        If save_actual_dance is True, dance from camera is recorded to ACTUAL_DANCE_DATA_PATH while it goes on.
+        """
+        self._dance_data_path = dance_data_path
+        if self._pattern_cache:
+            self._pattern_dance = self._pattern_cache.get(dance_data_path)
+        else:
+            self._pattern_dance = create_dance_from_data_file(dance_data_path)
+        self._is_video_being_played = True
+        start_time = time.time()
+        video_length = self.pattern_dance.timestamps[-1]
+        # frames from camera are bounded by length of the pattern, so storage is allocated once
+        capacity = max(len(self.pattern_dance), int(math.ceil(video_length * ACTUAL_DANCE_FRAME_RATE)) + 1)
+        self._actual_dance = Dance([], name=self.pattern_dance.name, node_ids=self.pattern_dance.node_ids,
+                                   capacity=capacity)
+        self._scorer = LimbScorer(self.pattern_dance.node_ids)
+        if self.pattern_dance.limb_angles is None:
+            self.pattern_dance.precompute_limb_angles(self._scorer)
+        self._landmark_rows = None
+        if tuple(self.pattern_dance.node_ids) != self._landmark_encoder.node_ids:
+            self._landmark_rows = self._landmark_encoder.rows_of(self.pattern_dance.node_ids)
+        self.set_displayer_timestamp(0)
+
+        self._score_history.clear()
+        window = StreamingAggregate()
+        t_0 = start_time
+        depth = 0.5
+        n = 10
+        radius = numpy.linspace(0,-depth,n)
+
+        stop_event = threading.Event()
+        frames = LatestQueue(PIPELINE_QUEUE_SIZE)
+        skeletons = LatestQueue(PIPELINE_QUEUE_SIZE)
+        stages = [
+            PipelineStage("capture", lambda: self._capture_frame(start_time, stop_event),
+                          output_queue=frames, stop_event=stop_event),
+            PipelineStage("inference", lambda frame: self._estimate_skeleton(frame, dimension, skeletons),
+                          frames, skeletons, stop_event),
+        ]
+        recorder = None
+        if save_actual_dance:
+            recording_path = f"{ACTUAL_DANCE_DATA_PATH}/{add_current_timestamp_to_filename(self.pattern_dance.name)}"\
+                             f"{DANCE_RECORDING_EXTENSION}"
+            recorder = DanceRecorder(recording_path, self.actual_dance.node_ids, self.actual_dance.name)
+            self._recording_path = recorder.path
+        for stage in stages:
+            stage.start()
+
+        try:
+            while self._is_video_being_played and self.displayer_timestamp < video_length \
+                    and not (cancel_event and cancel_event.is_set()):
+                skeleton = skeletons.get(PIPELINE_POLL_INTERVAL)
+                self.set_displayer_timestamp(time.time() - start_time)
+                if skeleton is None:
+                    if skeletons.closed:
+                        #Something is wrong with camera or pose estimation
+                        break
+                    continue
+                coordinates = self.actual_dance._skeleton_to_row(skeleton)
+                self.actual_dance.add_frame(skeleton.timestamp, coordinates)
+                if recorder:
+                    recorder.add_frame(skeleton.timestamp, coordinates)
+                if self._landmark_bus.subscriber_count:
+                    self._publish_landmarks(skeleton.timestamp)
+
+                frame_score = self._compare_recent_dance(radius)
+                if frame_score:
+                    window.add(frame_score.best)
+                    self._score_history.append((self._displayer_timestamp, frame_score.best,
+                                                frame_score.worst, frame_score.base))
+
+                if (time.time() - t_0) >= timestep:#when we output the result
+                    t_0 = time.time()
+                    if len(window):
+                        avg_value = window.mean
+                        # report is what we want the user to see, here we print it
+                        # report = getGrade(avg_value)
+                        self._event_bus.publish(avg_value)
+
+                    window.reset()
+        finally:
+            stop_event.set()
+            for stage in stages:
+                stage.join()
+                if stage.error:
+                    print(f"Stage {stage.name} failed: {stage.error!r}")
+            if recorder:
+                recorder.close()
+
+    def _publish_landmarks(self, timestamp):
+        """Publishes actual pose with the given timestamp together with the pattern pose from the same moment.
+        """
+        actual_index = self.actual_dance.get_frame_index_by_timestamp(timestamp)
+        pattern_index = self.pattern_dance.get_frame_index_by_timestamp(timestamp)
+        if actual_index is None or pattern_index is None:
+            return
+        rows = self._landmark_rows
+        record = self._landmark_encoder.encode(self.actual_dance.timestamps[actual_index],
+                                               self.actual_dance.positions[actual_index],
+                                               self.pattern_dance.timestamps[pattern_index],
+                                               self.pattern_dance.positions[pattern_index], rows, rows)
+        self._landmark_bus.publish(record)
+
+    def _capture_frame(self, start_time, stop_event):
+        """Capture stage of compare_dances pipeline. Returns a frame from camera with its timestamp.
+        """
+        ret, frame = self.camera.read()
+        if not ret:
+            if getattr(self.camera, "is_running", False):
+                # shared camera is retrying, so frames will come again
+                return None
+            #Something is wrong with camera
+            stop_event.set()
+            return None
+        return time.time() - start_time, frame
+
+    def _estimate_skeleton(self, timestamped_frame, dimension, skeletons: LatestQueue):
+        """Inference stage of compare_dances pipeline. Starts estimation of a frame, and puts the Skeleton
+        into skeletons queue when it is ready. With asynchronous estimators this does not wait for the result.
+        """
+        if self._owns_pose_estimator and self._model_controller.model_path != self._estimator_model_path:
+            self._pose_estimator.close()
+            self._estimator_model_path = self._model_controller.model_path
+            self._pose_estimator = LocalPoseEstimator(LIVE_RUNNING_MODE, self._estimator_model_path)
+
+        timestamp, frame = timestamped_frame
+        scale = self._model_controller.scale
+        if scale != 1:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        imgRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        submit_time = time.perf_counter()
+        def on_result(landmarks, timestamp):
+            # shared estimators report time of estimation alone, without waiting for other sessions' frames
+            latency = getattr(self._pose_estimator, "inference_time", None)
+            self._model_controller.record(latency if latency is not None else time.perf_counter() - submit_time)
+            skeletons.put(create_skeleton_from_landmark_array(landmarks, timestamp, dimension))
+
+        self._pose_estimator.estimate_async(imgRGB, timestamp, on_result)
+
+    def save_actual_dance(self, file_name=None):
+        """Sace dance form camera as a csv file named file_name.
+        """
+        if not file_name:
+            file_name = f"{ACTUAL_DANCE_DATA_PATH}/{add_current_timestamp_to_filename(self.pattern_dance.name)}.csv"
+        write_data_to_csv_file(self.actual_dance, file_name, SKELETON_FILE)
+
+
+    # def _get_dance_data_from_camera(self, dimension = DEFAULT_PROJECTION):
+    #     """A method responsible gathering data from camera and updating
+    #     actual_dance Dance class object with new Skeletons bases on its data.
+    #     Method works until viedo is being played.
+
+    #     Args:
+    #         dimension (str, optional): Describes in how many dimensions should data be generated. Possible values are "2D" and "3D".
+    #         Defaults to DEFAULT_PROJECTION ("2D").
+    #     """
+
+    def _compare_recent_dance(self, delays) -> FrameScore:
+        """
+        Get the comparison of recent dance, based on gathered data from camera and data about dance from viedo.
+        The most recent pose from camera is compared with pattern poses shifted by every delay at once.
+        Returns None if the pose from camera is incomplete.
+        """
+        last_index = self.actual_dance.get_frame_index_by_timestamp(self.displayer_timestamp)
+        if last_index is None or not self.actual_dance.valid[last_index]:# triggers when there is no dance data
+            return None
+
+        last_timestamp = self.actual_dance.timestamps[last_index]
+        pattern_indices = self.pattern_dance.get_frame_indices_by_timestamps(last_timestamp - delays)#what if timestam is negative?
+
+        actual_angles = self._scorer.limb_angles(self.actual_dance.positions[last_index])
+        pattern_angles = self.pattern_dance.limb_angles[pattern_indices]
+        return self._scorer.score(actual_angles, pattern_angles, delays, last_timestamp)
+
+
+def get_dance_name_from_path(path: str):
+    file_name = os.path.basename(path)
+    file_name = file_name.split(".")[0]
+    return file_name
+
+def add_current_timestamp_to_filename(filename):
+    now = datetime.now()
+    datetime_format = "%Y-%m-%d_%H-%M-%S"
+    datetime_text = now.strftime(datetime_format)
+    new_filename = f"{filename}_{datetime_text}"
+
+    return new_filename
+
+
+def find_pattern_dance_file(dance_name, directory=PATTERN_DANCE_DATA_PATH):
+    """Returns path of pattern dance data file for dance_name, preferring binary file over csv file.
+    """
+    binary_path = os.path.join(directory, dance_name + BINARY_DANCE_EXTENSION)
+    if os.path.exists(binary_path):
+        return binary_path
+    return os.path.join(directory, dance_name + ".csv")
+
+
+def create_dance_from_data_file(data_file):
+    """Creates a Dance from data file. Binary dance files are memory-mapped, dance recordings are read block by block,
+    and other files are read as csv.
+    """
+    if is_binary_dance_file(data_file):
+        header, timestamps, positions = read_binary_dance_file(data_file)
+        node_ids = header["node_ids"]
+    elif is_dance_recording_file(data_file):
+        header, timestamps, positions = read_dance_recording(data_file)
+        node_ids = header["node_ids"]
+    else:
+        timestamps, positions, node_ids = _read_csv_dance_file(data_file)
+
+    dance = Dance.from_arrays(timestamps, positions, node_ids, name=get_dance_name_from_path(data_file))
+    dance.precompute_limb_angles(LimbScorer(dance.node_ids))
+    return dance
+
+
+def _read_csv_dance_file(data_file):
+    """Reads csv dance data file. Header is mapped to node ids once, and the whole numeric block
+    is parsed in a single call. Blank cells (missing Landmarks) become NaN.
+    """
+    nodes_name_dict = reverse_dictionary(NODES_NAME)
+    axes = {"x": 0, "y": 1, "z": 2}
+    with open(data_file, "r") as handle:
+        raw_headlines = next(csv.reader([handle.readline()]))
+        body = handle.read()
+
+    node_ids = []
+    columns = []
+    for raw_headline in raw_headlines[1:]:
+        node_id = nodes_name_dict[raw_headline[:-2]]
+        if node_id not in node_ids:
+            node_ids.append(node_id)
+        columns.append((node_ids.index(node_id), axes[raw_headline[-1]]))
+
+    # every blank cell is followed by "," or end of line; two passes cover runs of blank cells
+    for _ in range(2):
+        body = body.replace(",,", ",nan,")
+    body = body.replace(",\n", ",nan\n")
+    if body.endswith(","):
+        body += "nan"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)# empty file
+        data = numpy.loadtxt(io.StringIO(body), delimiter=",", ndmin=2, dtype=numpy.float64)
+    data = data.reshape(-1, len(raw_headlines))
+
+    positions = numpy.full((len(data), len(node_ids), 3), numpy.nan, dtype=numpy.float32)
+    node_columns, axis_columns = numpy.array(columns).reshape(-1, 2).T
+    positions[:, node_columns, axis_columns] = data[:, 1:]
+    return data[:, 0], positions, node_ids
+
+
+def get_dance_data_from_video(video_path, dimension = DEFAULT_PROJECTION, frame_stride=1):
+    """Creates a Dance by estimating pose in every frame_stride-th frame of video. Skipped frames are not decoded.
+    Landmarker runs in EXTRACTION_RUNNING_MODE, so a pose is tracked between frames instead of detected from scratch.
+    """
+    dance = Dance([], name=get_dance_name_from_path(video_path))
+    pose_estimator = LocalPoseEstimator(EXTRACTION_RUNNING_MODE, MODEL_PATHS[choose_model_tier(EXTRACTION_MODEL_TIER)])
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    current_frame = 0
+    try:
+        while True:
+            if current_frame % frame_stride:
+                if not cap.grab():
+                    return dance
+                current_frame += 1
+                continue
+            success, img = cap.read()
+            if not success:
+                return dance
+            imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            timestamp = current_frame / fps
+            landmarks = pose_estimator.estimate(imgRGB, timestamp)
+            dance.add_skeleton(create_skeleton_from_landmark_array(landmarks, timestamp, dimension))
+            current_frame += 1
+    finally:
+        cap.release()
+        pose_estimator.close()
+
+def getNthTupleElementFromList(L: list, n:int):
+    #when u have a list of tuples this function will return only the n-th element of each tuple as a list
+    R = []
+    for element in L:
+        R.append(element[n])
+    return R
+
+def getGrade(score: int):
+    #returns a string name for a score you are given
+    #fell free to adjust
+    scoring_system = {
+        #!keys have to be increasing and in [0,180]
+        10: "very good",
+        30: "good",
+        50: "almost",
+        100: "are u sure you are dancing?",
+        180: "u are not good at this"
+    }
+    for limit, result in scoring_system.items():
+        if score <= limit:
+            return result + ", " + str(int((score/180)*100)) + "% pose difference"
+    return "ERROR score so terrible it was out of bounds"
+
+
+# class MockDanceManager(DanceManager):
+#     def __init__(self, pattern_dance: str, actual_dance: Dance) -> None:
+#         """Mock testing class for DanceManager.
+
+#         Args:
+#             pattern_dance (Dance): A Dance class object, which mocks data from video.
+#             actual_dance (Dance): A Dance class object, which mocks data from camera.
+#         """
+
+#         self._dance_video_path = None
+#         self._pattern_dance = pattern_dance
+#         self._actual_dance = actual_dance
+#         self._dance_displayer_thread = None
+#         self._dance_data_getter_thread = None
+#         self._displayer_timestamp = 0
+#         self._is_video_being_played = False
+
+
+
+#     # def compare_dances(self):
+#         #last_frame = self.actual_dance.get_last_skeleton()
+#         # if not last_frame:
+#         #     return
+#         # pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp)
+
+#         # for lm in last_frame.landmarks():
+#         #     landmark_id = lm.id
+#         #     patt_lm = pattern_frame.get_landmark_by_id(landmark_id)
+#         #     error = 0
+#         #     if not lm:
+#         #         #Camera could not find a person
+#         #         pass
+#         #     elif not patt_lm:
+#         #         #Person could not be found in reference video
+#         #         pass
+#         #     else:
+#         #         landmark_error = math.sqrt((lm.x - patt_lm.x)**2 + (lm.y - patt_lm.y)**2 + (lm.z - patt_lm.z)**2)
+#         #         error += landmark_error
+
+#         # print(f"{last_frame.timestamp}: {error}")
+#     #     self._is_video_being_played = True
+#     #     time_start = time.time()
+#     #     dance_time = self.pattern_dance.get_last_skeleton().timestamp
+
+#     #     values = []
+#     #     inv_values =[]
+#     #     base_values = []
+#     #     t = []
+
+#     #     while self._is_video_being_played:
+#     #         depth = 0.5
+#     #         n = 10
+#     #         radius = numpy.linspace(0,-depth,n)
+#     #         results = []
+
+#     #         for delay in radius:
+#     #             res = self.alt_compare_recent_dance(delay)
+#     #             if res:
+#     #                 score,output = res
+#     #                 #print(res)
+#     #                 #results.append(score)
+#     #                 if score != None:
+#     #                     results.append((score,output))
+
+#     #         if not results:
+#     #             print("check2")
+
+#     #         values.append(min(results))
+#     #         inv_values.append(max(results))
+#     #         base_values.append(results[0])
+
+#     #         t.append(self._displayer_timestamp)
+#     #         #print(f"time: {self._displayer_timestamp}, score:{min(results)}, inv_score{max(results)}")
+#     #         self._displayer_timestamp = time.time() - time_start
+#     #         if self._displayer_timestamp > dance_time:
+#     #             self._is_video_being_played = False
+
+#     #     #values is a list of tuples first one being score second one being output
+#     #     #so now since we dont need it we need to strip the second element form the tupels in the list
+#     #     values = getNthTupleElementFromList(values, 0)
+#     #     base_values = getNthTupleElementFromList(base_values, 0)
+#     #     inv_values = getNthTupleElementFromList(inv_values, 0)
+
+#     #     avg_value = sum(values)/len(values)
+#     #     inv_avg_value = sum(inv_values)/len(inv_values)
+#     #     avg_base = sum(base_values)/len(base_values)
+
+#     #     print(f"average score is: {avg_value}, average worst score is: {inv_avg_value}, base score is {avg_base}")
+#     #     print(f"your score is: {getGrade(avg_value)}")
+
+#     #     if len(values) == len(inv_values) == len(base_values) == len(t):
+#     #         plt.plot(t,inv_values, linewidth = 1, label = "worst")
+#     #         plt.plot(t,base_values, linewidth = 1, label = "base")
+#     #         plt.plot(t,values, linewidth = 1,label = "best")
+#     #         plt.legend()
+#     #         plt.show()
+#     #     else:
+#     #         print(f"Pyplot lists not matching {len(values)}, {len(inv_values)}, {len(base_values)}, {len(t)}")
+#     #     #PLOT THE VALUES
+
+#     def compare_dances_live(self, timestep: float):
+#         # self._is_video_being_played = True
+#         # time_start = time.time()
+#         # dance_time = self.pattern_dance.get_last_skeleton().timestamp
+
+#         # values = []
+#         # inv_values =[]
+#         # base_values = []
+#         # t = []
+#         # t_0 = time_start
+#         # value_record = []
+
+#         # while self._is_video_being_played:
+#         #     results = []
+
+#         #     for delay in radius:
+#         #         res = self.alt_compare_recent_dance(delay)
+#         #         if res:
+#         #             score,output = res
+#         #             #print(res)
+#         #             #results.append(score)
+#         #             if score != None:
+#         #                 results.append((score,output))
+
+#         #     if not results:
+#         #         print("check2")
+
+#         #     values.append(min(results))
+#         #     inv_values.append(max(results))
+#         #     base_values.append(results[0])
+
+#         #     t.append(self._displayer_timestamp)
+#         #     #print(f"time: {self._displayer_timestamp}, score:{min(results)}, inv_score{max(results)}")
+#         #     #print(f"{self.displayer_timestamp} t_0: {t_0}")
+#         #     if (time.time() - t_0) >= timestep:#when we output the result
+#         #         t_0 = time.time()
+#         #         values = getNthTupleElementFromList(values, 0)
+#         #         value_record.extend(values)
+#         #         avg_value = sum(values)/len(values)
+#         #         #report is what we want the user to see, here we print it
+#         #         report = getGrade(avg_value)
+#         #         print(report)
+
+#         #         values.clear()
+
+
+
+#         #     self._displayer_timestamp = time.time() - time_start
+#         #     if self._displayer_timestamp > dance_time:
+#         #         self._is_video_being_played = False
+
+#         #values is a list of tuples first one being score second one being output
+#         #so now since we dont need it we need to strip the second element form the tupels in the list
+#         # values = getNthTupleElementFromList(values, 0)
+#         # base_values = getNthTupleElementFromList(base_values, 0)
+#         # inv_values = getNthTupleElementFromList(inv_values, 0)
+
+#         # avg_value = sum(values)/len(values)
+#         # inv_avg_value = sum(inv_values)/len(inv_values)
+#         # avg_base = sum(base_values)/len(base_values)
+#         return
+
+
+
+#     # def _compare_recent_dance(self):
+#     #     """
+#     #     Get the comparison of recent dance, based on gathered data from camera and data about dance from viedo.
+#     #     """
+#     #     last_frame = self.actual_dance.get_skeleton_by_timestamp(self.displayer_timestamp)
+#     #     if not last_frame:
+#     #         return
+#     #     pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp)
+
+#     #     for lm in last_frame.landmarks():
+#     #         landmark_id = lm.id
+#     #         patt_lm = pattern_frame.get_landmark_by_id(landmark_id)
+#     #         error = 0
+#     #         if not lm:
+#     #             #Camera could not find a person
+#     #             pass
+#     #         elif not patt_lm:
+#     #             #Person could not be found in reference video
+#     #             pass
+#     #         else:
+#     #             landmark_error = math.sqrt((lm.x - patt_lm.x)**2 + (lm.y - patt_lm.y)**2 + (lm.z - patt_lm.z)**2)
+#     #             error += landmark_error
+
+#     #     print(f"{last_frame.timestamp}: {error}")
+
+#     def alt_compare_recent_dance(self, delay) -> float:#delay can be set to account dancers dealy
+#         last_frame = self.actual_dance.get_skeleton_by_timestamp(self.displayer_timestamp)  #Returns a Skeleton, which has the biggest timestamp from all Skeletons in this Dance. Returns None if there isn't any Skeleon in this list.
+
+#         pattern_frame = self.pattern_dance.get_skeleton_by_timestamp(last_frame.timestamp - delay)#what if timestam is negative?
+
+#         if not last_frame or not pattern_frame:# triggers when there is no dance data
+#             #print("no last frame or pattern frame")
+#             return#returns a none which causes issues in alt_dance_manager
+
+#         # if isinstance(EmptySkeleton, )
+#         #last_frame is the skeleton of the user
+#         #pattern_frame is the skeleton generated form the video for that time instance
+
+#         limbs = {#orientation from their perspective
+#             #key -> [points, weight(for cumulative error)]
+#             "right_arm":  [[14,12,24], 0.7],
+#             "right_hand": [[16,12,24], 1],
+#             "left_arm":   [[13,11,23], 0.7],
+#             "left_hand":  [[15,11,23], 1],
+
+#             "right_leg":  [[23,24,26], 0.2],
+#             "right_foot": [[23,24,28], 0.2],
+#             "left_leg":   [[24,23,25], 0.2],
+#             "left_foot":  [[24,23,27], 0.2]
+#             }
+
+#         #practice error calculation for one limb
+#         a_cos, a_sin = last_frame.get_cossin(limbs["right_arm"][0])
+#         p_cos, p_sin = pattern_frame.get_cossin(limbs["right_arm"][0])
+#         error_rignt_arm = min(abs(a_cos - p_cos), abs(a_sin - p_sin))
+
+#         #actual error calculation for all limbs
+#         error = 0
+#         sum = 0
+#         output = ""
+#         for limb in limbs:
+#             a_cos, a_sin = last_frame.get_cossin(limbs[limb][0])
+#             p_cos, p_sin = pattern_frame.get_cossin(limbs[limb][0])
+#             #error += min(abs(a_cos - p_cos), abs(a_sin - p_sin)) * limbs[limb][1]
+#             angle = abs(math.degrees(math.acos(a_cos) - math.acos(p_cos)))
+#             even = " "
+#             if angle < 10:
+#                 even = "  "
+#             elif angle >= 100:
+#                 even = ""
+#             output += f"{limb}: {int(angle)}{even} | "
+#             error += angle*limbs[limb][1]
+#             sum += limbs[limb][1]# update total weight
+
+#         output = f"{int(self.displayer_timestamp*1000)}ms, Res (deg): | {output}"
+#         error = error/sum#adjust error for weight
+#         #print(a_cos, p_cos)
+#         #print(error_rignt_arm)
+#         #print(error)
+#         return error, output#lets plot it and see if it makes sense
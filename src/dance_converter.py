@@ -0,0 +1,24 @@
+import os
+import sys
+from binary_dance import write_binary_dance_file, BINARY_DANCE_EXTENSION
+from dance import create_dance_from_data_file
+from constants import PATTERN_DANCE_DATA_PATH
+
+
+def convert_dance_file(data_file, output_file=None):
+    """Converts dance data file into binary dance file. By default output has the same path, with .dance extension.
+    """
+    if not output_file:
+        output_file = os.path.splitext(data_file)[0] + BINARY_DANCE_EXTENSION
+    write_binary_dance_file(create_dance_from_data_file(data_file), output_file)
+    return output_file
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else PATTERN_DANCE_DATA_PATH
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if file_name.endswith(".csv"):
+                print(convert_dance_file(os.path.join(source, file_name)))
+    else:
+        print(convert_dance_file(source, sys.argv[2] if len(sys.argv) > 2 else None))
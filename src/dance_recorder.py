@@ -0,0 +1,169 @@
+import json
+import os
+import struct
+import time
+import zlib
+import numpy as np
+from constants import RECORDER_FLUSH_FRAMES, RECORDER_FLUSH_INTERVAL, RECORDER_COMPRESSION
+
+DANCE_RECORDING_MAGIC = b"DANCEREC"
+DANCE_RECORDING_VERSION = 1
+DANCE_RECORDING_EXTENSION = ".dancerec"
+# number of frames and length of payload of a block; block with 0 frames marks a finished recording
+_BLOCK = struct.Struct("<II")
+
+
+def is_dance_recording_file(path: str) -> bool:
+    """Returns True if file starts with dance recording header.
+    """
+    with open(path, "rb") as handle:
+        return handle.read(len(DANCE_RECORDING_MAGIC)) == DANCE_RECORDING_MAGIC
+
+
+class DanceRecorder:
+    def __init__(self, path: str, node_ids, name="", compress=RECORDER_COMPRESSION,
+                 flush_frames=RECORDER_FLUSH_FRAMES, flush_interval=RECORDER_FLUSH_INTERVAL) -> None:
+        """A class which writes frames of a dance to an append-only file while the dance goes on,
+        so that a session is never kept whole in memory, and a crash loses at most the last unflushed frames.
+        File starts with magic bytes, length of JSON header and JSON header, followed by blocks.
+        Every block has number of frames and length of payload, and payload with float64 timestamps
+        and float32 (frames, nodes, 3) coordinates, optionally compressed with zlib.
+
+        Args:
+            path (str): Path of created file. If it exists, a number is added to the name.
+            node_ids (List[int]): Ids of Landmarks, in order of columns of recorded coordinates.
+            name (str, optional): Name of the dance.
+            compress (bool, optional): If True, blocks are compressed. Defaults to RECORDER_COMPRESSION.
+            flush_frames (int, optional): Number of frames buffered before they are written. Defaults to RECORDER_FLUSH_FRAMES.
+            flush_interval (float, optional): Seconds after which buffered frames are written, even if there are
+            less of them than flush_frames. Defaults to RECORDER_FLUSH_INTERVAL.
+        """
+        self._node_ids = tuple(node_ids)
+        self._compress = compress
+        self._flush_interval = flush_interval
+        self._timestamps = np.empty(flush_frames, dtype="<f8")
+        self._positions = np.empty((flush_frames, len(self._node_ids), 3), dtype="<f4")
+        self._size = 0
+        self._written = 0
+        self._last_flush = time.monotonic()
+
+        header = json.dumps({"version": DANCE_RECORDING_VERSION, "name": name, "node_ids": list(self._node_ids),
+                             "compression": "zlib" if compress else None}).encode()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._handle = self._create_file(path)
+        self._handle.write(DANCE_RECORDING_MAGIC)
+        self._handle.write(struct.pack("<I", len(header)))
+        self._handle.write(header)
+        self._handle.flush()
+
+    def _create_file(self, path):
+        """Opens a new file for writing. Existing files (e.g. of another session recording the same dance
+        in the same second) are never overwritten; a number is added to the name instead.
+        """
+        base, extension = os.path.splitext(path)
+        attempt = 0
+        while True:
+            try:
+                handle = open(path, "xb")
+                self._path = path
+                return handle
+            except FileExistsError:
+                attempt += 1
+                path = f"{base}_{attempt}{extension}"
+
+    @property
+    def path(self) -> str:
+        """Returns path of the recording, which has a number added, if the given path was taken.
+        """
+        return self._path
+
+    @property
+    def frames(self) -> int:
+        """Returns number of recorded frames, including the buffered ones.
+        """
+        return self._written + self._size
+
+    @property
+    def closed(self) -> bool:
+        return self._handle is None
+
+    def add_frame(self, timestamp: float, coordinates):
+        """Records a frame of normalized coordinates, in order of node_ids. Missing coordinates are NaN.
+        """
+        self._timestamps[self._size] = timestamp
+        self._positions[self._size] = coordinates
+        self._size += 1
+        if self._size == len(self._timestamps) or time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered frames as a block.
+        """
+        self._last_flush = time.monotonic()
+        if not self._size:
+            return
+        payload = self._timestamps[:self._size].tobytes() + self._positions[:self._size].tobytes()
+        if self._compress:
+            payload = zlib.compress(payload, 1)
+        self._handle.write(_BLOCK.pack(self._size, len(payload)))
+        self._handle.write(payload)
+        self._handle.flush()
+        self._written += self._size
+        self._size = 0
+
+    def close(self):
+        """Writes buffered frames and marks the recording as finished. Can be called many times.
+        """
+        if self._handle is None:
+            return
+        self.flush()
+        self._handle.write(_BLOCK.pack(0, 0))
+        self._handle.close()
+        self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_dance_recording(path: str):
+    """Reads a file written by DanceRecorder. Recording, which was not closed (e.g. after a crash),
+    is read up to its last complete block, and "complete" in its header is False.
+
+    Returns:
+        Tuple[dict, numpy.ndarray, numpy.ndarray]: Header, timestamps and coordinates.
+    """
+    with open(path, "rb") as handle:
+        if handle.read(len(DANCE_RECORDING_MAGIC)) != DANCE_RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a dance recording file.")
+        header_length, = struct.unpack("<I", handle.read(4))
+        header = json.loads(handle.read(header_length))
+        if header["version"] != DANCE_RECORDING_VERSION:
+            raise ValueError(f"Unsupported dance recording version: {header['version']}")
+        data = handle.read()
+
+    n_nodes = len(header["node_ids"])
+    timestamps = []
+    positions = []
+    header["complete"] = False
+    offset = 0
+    while offset + _BLOCK.size <= len(data):
+        frames, payload_length = _BLOCK.unpack_from(data, offset)
+        offset += _BLOCK.size
+        if not frames:
+            header["complete"] = True
+            break
+        if offset + payload_length > len(data):
+            break
+        payload = data[offset:offset + payload_length]
+        offset += payload_length
+        if header["compression"] == "zlib":
+            payload = zlib.decompress(payload)
+        timestamps.append(np.frombuffer(payload, dtype="<f8", count=frames))
+        positions.append(np.frombuffer(payload, dtype="<f4", offset=frames * 8).reshape(frames, n_nodes, 3))
+
+    if not timestamps:
+        return header, np.empty(0, dtype=np.float64), np.empty((0, n_nodes, 3), dtype=np.float32)
+    return header, np.concatenate(timestamps), np.concatenate(positions)
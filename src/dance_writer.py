@@ -1,11 +1,28 @@
-import sys
-from data_writer import write_data_to_csv_file
-from dance import get_dance_data_from_video
-from constants import PATTERN_DANCE_DATA_PATH
+import argparse
+import os
+from dance import get_dance_name_from_path
+from extraction import extract_pattern_files, find_video_files
+from constants import PATTERN_DANCE_DATA_PATH, DANCE_VIDEOS_PATH, EXTRACTION_WORKERS, EXTRACTION_SAMPLE_RATE
+
 if __name__ == "__main__":
-    dance = get_dance_data_from_video(sys.argv[1])
-    if len(sys.argv) <= 2:
-        data_path = f"{PATTERN_DANCE_DATA_PATH}/{dance.name}.csv"
-        write_data_to_csv_file(dance, data_path)
+    parser = argparse.ArgumentParser(description="Extracts pattern dance data from dance videos. "
+                                     "Interrupted extraction is resumed when the same command is run again.")
+    parser.add_argument("source", nargs="?", default=DANCE_VIDEOS_PATH,
+                        help="Video file, or directory with videos to extract in batch. Defaults to DANCE_VIDEOS_PATH.")
+    parser.add_argument("output", nargs="?",
+                        help="Output file for a single video, or output directory for batch. Defaults to PATTERN_DANCE_DATA_PATH.")
+    parser.add_argument("--workers", type=int, default=EXTRACTION_WORKERS, help="Number of worker processes.")
+    parser.add_argument("--sample-rate", type=float, default=EXTRACTION_SAMPLE_RATE,
+                        help="About how many frames per second are estimated, and rate of the uniform time grid, "
+                        "to which poses are interpolated. 0 estimates every frame and keeps original timestamps.")
+    parser.add_argument("--overwrite", action="store_true", help="Extract again videos, whose output is up to date.")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        output_directory = args.output or PATTERN_DANCE_DATA_PATH
+        outputs = {video_path: f"{output_directory}/{get_dance_name_from_path(video_path)}.csv"
+                   for video_path in find_video_files(args.source)}
     else:
-        write_data_to_csv_file(dance, sys.argv[2])
\ No newline at end of file
+        outputs = {args.source: args.output or f"{PATTERN_DANCE_DATA_PATH}/{get_dance_name_from_path(args.source)}.csv"}
+    sample_rate = args.sample_rate or None
+    extract_pattern_files(outputs, args.workers, overwrite=args.overwrite, sample_rate=sample_rate, resample_rate=sample_rate)
@@ -1,15 +1,18 @@
 from skeleton import *
 import csv
+import numpy
 from typing import List
 from constants import NODES_NAME, SKELETON_FILE
 
-def write_data_to_csv_file(dance_data, path: str, skeleton_file=SKELETON_FILE):
+CSV_WRITE_CHUNK_FRAMES = 1024
+
 
-    with open(skeleton_file, "r") as handle:
-        csv_reader = csv.DictReader(handle, delimiter=",")
-        used_nodes = [int(row["child"]) for row in csv_reader]
-        used_nodes.sort()
-        used_nodes = [NODES_NAME[id] for id in used_nodes]
+def write_data_to_csv_file(dance_data, path: str, skeleton_file=SKELETON_FILE):
+    """Writes a Dance as a csv file. Rows are written straight from columnar data of the Dance in chunks,
+    without creating a Skeleton for every frame or keeping the whole table of rows in memory.
+    """
+    node_ids = get_skeleton_topology(skeleton_file).node_ids
+    used_nodes = [NODES_NAME[id] for id in node_ids]
 
     csv_file_names = ["timestamp"]
     for node in used_nodes:
@@ -17,16 +20,23 @@ def write_data_to_csv_file(dance_data, path: str, skeleton_file=SKELETON_FILE):
         csv_file_names.append(f"{node}_y")
         csv_file_names.append(f"{node}_z")
 
-    data_to_write = [csv_file_names]
-    for skeleton in dance_data.skeleton_table:
-        timestamp = skeleton.timestamp
-        current_skeleton_data = [timestamp]
-        for landmark in skeleton.landmarks()[1:]:
-            current_skeleton_data += [landmark.x, landmark.y, landmark.z]
-        data_to_write.append(current_skeleton_data)
+    # columns of the Dance in order of the skeleton file; missing coordinates are written as blank cells
+    dance_index = {id: index for index, id in enumerate(dance_data.node_ids)}
+    columns = [dance_index.get(id, -1) for id in node_ids]
+    timestamps = dance_data.timestamps
+    positions = dance_data.positions
 
     with open(path, "w", newline='') as handle:
         writer = csv.writer(handle, delimiter=',')
+        writer.writerow(csv_file_names)
 
-        for row in data_to_write:
-            writer.writerow(row)
+        for start in range(0, len(timestamps), CSV_WRITE_CHUNK_FRAMES):
+            stop = start + CSV_WRITE_CHUNK_FRAMES
+            chunk = numpy.full((len(timestamps[start:stop]), len(columns), 3), numpy.nan, dtype=numpy.float64)
+            for column, index in enumerate(columns):
+                if index >= 0:
+                    chunk[:, column] = positions[start:stop, index]
+            chunk = numpy.column_stack((timestamps[start:stop], chunk.reshape(len(chunk), -1)))
+            cells = chunk.astype(str)
+            cells[numpy.isnan(chunk)] = ""
+            writer.writerows(cells.tolist())
@@ -0,0 +1,112 @@
+import threading
+from pipeline import LatestQueue
+from constants import EVENT_QUEUE_SIZE, EVENT_HEARTBEAT_INTERVAL
+
+
+def format_sse(data, event=None) -> str:
+    """Returns a message in text/event-stream format. Multiline data is split into several data fields.
+    """
+    message = f"event: {event}\n" if event else ""
+    for line in str(data).split("\n"):
+        message += f"data: {line}\n"
+    return message + "\n"
+
+
+class EventBus:
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE) -> None:
+        """A class which pushes published events to every subscriber.
+        Each subscriber has its own bounded queue, so subscribers do not steal events from each other,
+        and a subscriber which does not read (e.g. a closed browser tab) loses its oldest events
+        instead of making memory grow.
+
+        Args:
+            queue_size (int, optional): Number of events kept for a subscriber, which does not keep up.
+            Defaults to EVENT_QUEUE_SIZE.
+        """
+        self._queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, data, event=None):
+        """Puts an event into queue of every subscriber, and wakes them up.
+
+        Args:
+            data: Data of event. It is converted to str when sent.
+            event (str, optional): Type of event. Defaults to None, which is handled by onmessage in browser.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._queue.put((event, data))
+
+    def subscribe(self, queue_size=None) -> "EventSubscription":
+        subscription = EventSubscription(self, queue_size or self._queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def close(self):
+        """Closes every subscription. Their streams end after remaining events are sent.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._queue.close()
+
+
+class EventSubscription:
+    def __init__(self, bus: EventBus, queue_size: int) -> None:
+        """A single consumer of events from EventBus.
+
+        Args:
+            bus (EventBus): Source of events.
+            queue_size (int): Number of events kept, when consumer does not keep up.
+        """
+        self._bus = bus
+        self._queue = LatestQueue(queue_size)
+
+    @property
+    def dropped(self) -> int:
+        """Returns number of events, which were dropped because consumer did not keep up.
+        """
+        return self._queue.dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._queue.closed
+
+    def get(self, timeout=None):
+        """Waits for the next event. Returns (event, data), or None if no event came within timeout,
+        or the subscription is closed.
+        """
+        return self._queue.get(timeout)
+
+    def stream(self, heartbeat=EVENT_HEARTBEAT_INTERVAL):
+        """Generator of text/event-stream messages. Events are yielded as soon as they are published.
+        When no event comes for heartbeat seconds, a comment is yielded, which keeps the connection alive
+        and lets the server notice that client went away. Subscription is closed when generator is closed.
+        """
+        try:
+            while True:
+                item = self._queue.get(heartbeat)
+                if item is None:
+                    if self._queue.closed:
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                event, data = item
+                yield format_sse(data, event)
+        finally:
+            self.close()
+
+    def close(self):
+        self._queue.close()
+        self._bus._unsubscribe(self)
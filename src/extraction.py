@@ -0,0 +1,280 @@
+import os
+import json
+import shutil
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dance import Dance, get_dance_name_from_path
+from pose_estimation import LocalPoseEstimator, create_skeleton_from_landmark_array
+from adaptive_model import choose_model_tier
+from pattern_cache import find_dance_files
+from data_writer import write_data_to_csv_file
+from constants import DEFAULT_PROJECTION, EXTRACTION_RUNNING_MODE, EXTRACTION_MODEL_TIER, MODEL_PATHS,\
+    EXTRACTION_WORKERS, EXTRACTION_CHUNK_FRAMES, VIDEO_EXTENSIONS
+
+def get_video_frame_info(video_path):
+    """Returns number of frames and frame rate of a video. Number of frames is 0, if it is not known.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Video {video_path} could not be opened.")
+        return max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0), cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+
+
+def get_frame_stride(fps: float, sample_rate=None) -> int:
+    """Returns every which frame of video with fps frames per second should be estimated,
+    to get about sample_rate poses per second. If sample_rate is None, every frame is estimated.
+    """
+    if not sample_rate or not fps:
+        return 1
+    return max(int(round(fps / sample_rate)), 1)
+
+
+def split_frame_ranges(frame_count: int, chunk_frames=EXTRACTION_CHUNK_FRAMES):
+    """Splits frames of a video into (start, stop) ranges of chunk_frames frames.
+    Stop of the last range is None, so it is read until the end of video, even if frame_count was underestimated.
+    """
+    starts = list(range(0, frame_count, chunk_frames)) or [0]
+    return [(start, stop) for start, stop in zip(starts, starts[1:] + [None])]
+
+
+def extract_frame_range(video_path, start: int, stop, fps: float, dimension=DEFAULT_PROJECTION, pose_estimator=None,
+                        frame_stride=1, model_path=None):
+    """Estimates poses in frames from start to stop (exclusive, None means end of video) of a video.
+    Returns (timestamps, positions, node_ids) with columnar data of a Dance.
+
+    Args:
+        frame_stride (int, optional): Only frames with index divisible by frame_stride are estimated.
+        Other frames are skipped without decoding them into images. Defaults to 1.
+        pose_estimator (LocalPoseEstimator, optional): Estimator to use. Defaults to a new estimator
+        in EXTRACTION_RUNNING_MODE, created for this range only, so that pose tracking does not carry over
+        from frames of another range or video.
+        model_path (str, optional): Model of the new estimator. Defaults to model of EXTRACTION_MODEL_TIER.
+    """
+    owns_estimator = pose_estimator is None
+    if owns_estimator:
+        model_path = model_path or MODEL_PATHS[choose_model_tier(EXTRACTION_MODEL_TIER)]
+        pose_estimator = LocalPoseEstimator(EXTRACTION_RUNNING_MODE, model_path)
+    dance = Dance([])
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        current_frame = start
+        while stop is None or current_frame < stop:
+            if current_frame % frame_stride:
+                if not cap.grab():
+                    break
+                current_frame += 1
+                continue
+            success, img = cap.read()
+            if not success:
+                break
+            imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            timestamp = current_frame / fps
+            landmarks = pose_estimator.estimate(imgRGB, timestamp)
+            dance.add_skeleton(create_skeleton_from_landmark_array(landmarks, timestamp, dimension))
+            current_frame += 1
+    finally:
+        cap.release()
+        if owns_estimator:
+            pose_estimator.close()
+    return dance.timestamps.copy(), dance.positions.copy(), dance.node_ids
+
+
+def stitch_frame_ranges(parts, name="") -> Dance:
+    """Creates one Dance from results of extract_frame_range, given in any order.
+    """
+    parts = sorted(parts, key=lambda part: part[0][0] if len(part[0]) else np.inf)
+    node_ids = parts[0][2]
+    return Dance.from_arrays(np.concatenate([part[0] for part in parts]),
+                             np.concatenate([part[1] for part in parts]), node_ids, name)
+
+
+class ExtractionCheckpoint:
+    def __init__(self, directory, video_path, model_path, chunk_frames, dimension, frame_stride=1) -> None:
+        """Append-only store of frame ranges, which were already extracted from a video.
+        Every finished range is written to its own file, which appears atomically, so after a crash
+        only ranges being extracted at that moment are lost. Stored ranges are used only if video, model
+        and extraction settings did not change since they were written.
+
+        Args:
+            directory (str): Directory of the checkpoint.
+            video_path (str): Path of extracted video.
+            model_path (str): Path of model file used in extraction.
+            chunk_frames (int): Number of frames in a range.
+            dimension (str): "2D" or "3D".
+            frame_stride (int, optional): Stride of estimated frames. Defaults to 1.
+        """
+        self._directory = directory
+        video_stat = os.stat(video_path)
+        self._manifest = {"video": os.path.abspath(video_path), "video_size": video_stat.st_size,
+                          "video_mtime": video_stat.st_mtime, "model": os.path.abspath(model_path),
+                          "chunk_frames": chunk_frames, "dimension": dimension, "frame_stride": frame_stride}
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def load(self):
+        """Returns a dict from start frame to a stored range. If stored ranges were made with other settings,
+        they are removed, and an empty dict is returned.
+        """
+        manifest_path = os.path.join(self._directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as handle:
+                if json.load(handle) == self._manifest:
+                    return self._load_ranges()
+        self.remove()
+        os.makedirs(self._directory)
+        with open(manifest_path, "w") as handle:
+            json.dump(self._manifest, handle)
+        return {}
+
+    def _load_ranges(self):
+        ranges = {}
+        for file_name in os.listdir(self._directory):
+            if file_name.startswith("range_") and file_name.endswith(".npz"):
+                with np.load(os.path.join(self._directory, file_name)) as data:
+                    ranges[int(data["start"])] = (data["timestamps"], data["positions"], tuple(data["node_ids"].tolist()))
+        return ranges
+
+    def save(self, start: int, part):
+        """Stores a range returned by extract_frame_range.
+        """
+        timestamps, positions, node_ids = part
+        path = os.path.join(self._directory, f"range_{start:09d}.npz")
+        with open(path + ".tmp", "wb") as handle:
+            np.savez(handle, start=start, timestamps=timestamps, positions=positions, node_ids=np.array(node_ids))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(path + ".tmp", path)
+
+    def remove(self):
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def _extract_videos(video_paths, n_workers, chunk_frames, dimension, report, checkpoint_directories=None,
+                    sample_rate=None, resample_rate=None):
+    """Generator of (video_path, Dance), yielded as soon as all ranges of a video are extracted.
+    Ranges found in checkpoints are not extracted again, and new ranges are added to checkpoints.
+    """
+    video_paths = list(dict.fromkeys(video_paths))
+    model_path = MODEL_PATHS[choose_model_tier(EXTRACTION_MODEL_TIER)]
+    parts = {}
+    checkpoints = {}
+    remaining = {}
+    ranges = []
+    for video_path in video_paths:
+        frame_count, fps = get_video_frame_info(video_path)
+        frame_stride = get_frame_stride(fps, sample_rate)
+        parts[video_path] = {}
+        if checkpoint_directories and checkpoint_directories.get(video_path):
+            checkpoints[video_path] = ExtractionCheckpoint(checkpoint_directories[video_path], video_path, model_path,
+                                                           chunk_frames, dimension, frame_stride)
+            parts[video_path] = checkpoints[video_path].load()
+            if parts[video_path]:
+                report(f"{os.path.basename(video_path)}: {len(parts[video_path])} ranges restored from checkpoint")
+        video_ranges = [(video_path, start, stop, fps, frame_stride)
+                        for start, stop in split_frame_ranges(frame_count, chunk_frames) if start not in parts[video_path]]
+        remaining[video_path] = len(video_ranges)
+        ranges += video_ranges
+
+    def finish(video_path):
+        dance = stitch_frame_ranges(parts.pop(video_path).values(), get_dance_name_from_path(video_path))
+        return video_path, dance.resample(resample_rate) if resample_rate else dance
+
+    for video_path in video_paths:
+        if not remaining[video_path]:
+            yield finish(video_path)
+    if not ranges:
+        return
+
+    with ProcessPoolExecutor(min(n_workers, len(ranges))) as executor:
+        futures = {executor.submit(extract_frame_range, video_path, start, stop, fps, dimension, None, frame_stride,
+                                   model_path):
+                   (video_path, start) for video_path, start, stop, fps, frame_stride in ranges}
+        for done, future in enumerate(as_completed(futures), 1):
+            video_path, start = futures[future]
+            part = future.result()
+            parts[video_path][start] = part
+            if video_path in checkpoints:
+                checkpoints[video_path].save(start, part)
+            report(f"[{done}/{len(futures)}] {os.path.basename(video_path)}: frames from {start} extracted")
+            remaining[video_path] -= 1
+            if not remaining[video_path]:
+                yield finish(video_path)
+
+
+def extract_dances_from_videos(video_paths, n_workers=EXTRACTION_WORKERS, chunk_frames=EXTRACTION_CHUNK_FRAMES,
+                               dimension=DEFAULT_PROJECTION, report=print, sample_rate=None, resample_rate=None):
+    """Creates Dances from many videos at once. Every video is split into ranges of frames, and all ranges are
+    estimated in a pool of processes, with a new landmarker for every range. Returns a dict from video path to Dance.
+
+    Args:
+        video_paths (List[str]): Paths of videos.
+        n_workers (int, optional): Number of worker processes. Defaults to EXTRACTION_WORKERS.
+        chunk_frames (int, optional): Number of frames in a range. Defaults to EXTRACTION_CHUNK_FRAMES.
+        dimension (str, optional): "2D" or "3D". Defaults to DEFAULT_PROJECTION.
+        report (Callable[[str], None], optional): Called with progress after every range. Defaults to print.
+        sample_rate (float, optional): About how many frames per second are estimated. Defaults to None (every frame).
+        resample_rate (float, optional): If given, Dances are resampled to a uniform grid with this rate. Defaults to None.
+    """
+    return dict(_extract_videos(video_paths, n_workers, chunk_frames, dimension, report,
+                                sample_rate=sample_rate, resample_rate=resample_rate))
+
+
+def extract_pattern_files(outputs, n_workers=EXTRACTION_WORKERS, chunk_frames=EXTRACTION_CHUNK_FRAMES,
+                          dimension=DEFAULT_PROJECTION, overwrite=False, report=print, write=write_data_to_csv_file,
+                          sample_rate=None, resample_rate=None):
+    """Resumable extraction of pattern dance files. Finished ranges of every video are checkpointed
+    in a directory next to its output file (output path with .partial suffix), so an interrupted extraction
+    continues where it stopped. When a video is finished, its ranges are compacted into the output file,
+    and the checkpoint is removed.
+    Videos, whose output file is newer than both the video and the model file, and has no checkpoint, are skipped,
+    unless overwrite is True.
+    Returns a list of written output files.
+
+    Args:
+        outputs (Dict[str, str]): Dict from video path to path of output file.
+        overwrite (bool, optional): If True, up to date outputs are extracted again. Defaults to False.
+        write (Callable[[Dance, str], None], optional): Writes Dance to output file. Defaults to write_data_to_csv_file.
+        sample_rate (float, optional): About how many frames per second are estimated. Defaults to None (every frame).
+        resample_rate (float, optional): If given, Dances are resampled to a uniform grid with this rate. Defaults to None.
+    """
+    model_path = MODEL_PATHS[choose_model_tier(EXTRACTION_MODEL_TIER)]
+    pending = {}
+    for video_path, output_path in outputs.items():
+        source_mtime = max(os.path.getmtime(path) for path in (video_path, model_path) if os.path.exists(path))
+        # output with a checkpoint next to it might have been written only partially
+        if not overwrite and os.path.exists(output_path) and os.path.getmtime(output_path) >= source_mtime \
+                and not os.path.exists(output_path + ".partial"):
+            report(f"{os.path.basename(video_path)}: {output_path} is up to date")
+            continue
+        pending[video_path] = output_path
+
+    checkpoint_directories = {video_path: output_path + ".partial" for video_path, output_path in pending.items()}
+    written = []
+    for video_path, dance in _extract_videos(pending, n_workers, chunk_frames, dimension, report, checkpoint_directories,
+                                             sample_rate, resample_rate):
+        write(dance, pending[video_path])
+        shutil.rmtree(checkpoint_directories[video_path], ignore_errors=True)
+        report(f"{os.path.basename(video_path)}: written to {pending[video_path]}")
+        written.append(pending[video_path])
+    return written
+
+
+def extract_dance_from_video(video_path, n_workers=EXTRACTION_WORKERS, chunk_frames=EXTRACTION_CHUNK_FRAMES,
+                             dimension=DEFAULT_PROJECTION, report=print, sample_rate=None, resample_rate=None) -> Dance:
+    """Creates a Dance from a video, estimating ranges of its frames in parallel.
+    Gives the same frames as get_dance_data_from_video, but pose tracking starts anew in every range.
+    """
+    return extract_dances_from_videos([video_path], n_workers, chunk_frames, dimension, report,
+                                      sample_rate, resample_rate)[video_path]
+
+
+def find_video_files(directory, extensions=VIDEO_EXTENSIONS):
+    return find_dance_files(directory, extensions)
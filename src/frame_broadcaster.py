@@ -0,0 +1,170 @@
+import threading
+import time
+import cv2
+from collections import deque
+from constants import FRAME_BUFFER_SIZE, FRAME_READ_TIMEOUT, CAMERA_RETRY_INTERVAL, CAMERA_MAX_RETRY_INTERVAL,\
+    CAMERA_REOPEN_FAILURES
+
+
+class FrameBroadcaster:
+    def __init__(self, camera, buffer_size=FRAME_BUFFER_SIZE, open_camera=None) -> None:
+        """A class which owns a camera and reads it in a single capture thread.
+        Every frame is published with its sequence number and capture time into a small ring buffer,
+        from which any number of FrameSubscriptions read independently, without contending for the device.
+        Published frames are read-only, because they are shared by all consumers.
+        Failed reads (e.g. while the device is starting) are retried with exponential backoff until the broadcaster
+        is stopped, and after CAMERA_REOPEN_FAILURES failures in a row the camera is opened again, if open_camera is given.
+
+        Args:
+            camera (cv2.VideoCapture): Camera to read.
+            buffer_size (int, optional): Number of most recent frames kept. Defaults to FRAME_BUFFER_SIZE.
+            open_camera (Callable[[], cv2.VideoCapture], optional): Opens the camera again. Defaults to None (camera is not reopened).
+        """
+        self._camera = camera
+        self._open_camera = open_camera
+        self._frames = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._subscribers = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def camera(self):
+        return self._camera
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def frame_shape(self):
+        """Returns (height, width, 3) shape of frames reported by the camera, or None if it is not known.
+        """
+        if self._camera is None:
+            return None
+        width = int(self._camera.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self._camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return (height, width, 3) if width > 0 and height > 0 else None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    def start(self):
+        """Starts the capture thread, if it is not running.
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._capture, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _capture(self):
+        failures = 0
+        while self._running:
+            ret, frame = self._camera.read() if self._camera is not None else (False, None)
+            if not ret:
+                #Something is wrong with camera, but it often recovers
+                failures += 1
+                if self._open_camera and failures % CAMERA_REOPEN_FAILURES == 0:
+                    self._reopen()
+                retry_interval = min(CAMERA_RETRY_INTERVAL * 2 ** min(failures - 1, 16), CAMERA_MAX_RETRY_INTERVAL)
+                with self._condition:
+                    self._condition.wait_for(lambda: not self._running, retry_interval)
+                continue
+            failures = 0
+            frame.flags.writeable = False
+            with self._condition:
+                self._sequence += 1
+                self._frames.append((self._sequence, time.time(), frame))
+                self._condition.notify_all()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _reopen(self):
+        if self._camera is not None:
+            self._camera.release()
+        try:
+            self._camera = self._open_camera()
+        except Exception as error:
+            print(f"Camera could not be opened: {error!r}")
+            self._camera = None
+
+    def subscribe(self) -> "FrameSubscription":
+        with self._condition:
+            self._subscribers += 1
+            return FrameSubscription(self, self._sequence)
+
+    def _unsubscribe(self):
+        with self._condition:
+            self._subscribers -= 1
+
+    def _next_frame(self, last_sequence: int, timeout=None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > last_sequence or not self._running, timeout)
+            if self._sequence <= last_sequence:
+                return None
+            oldest_sequence = self._frames[0][0]
+            if last_sequence + 1 < oldest_sequence:
+                # subscriber fell behind the ring buffer, so it continues from the most recent frame
+                return self._frames[-1]
+            return self._frames[last_sequence + 1 - oldest_sequence]
+
+
+class FrameSubscription:
+    def __init__(self, broadcaster: FrameBroadcaster, last_sequence: int) -> None:
+        """A single consumer of frames from FrameBroadcaster. It gets every published frame in order,
+        as long as it keeps up with the ring buffer, and the most recent frame after it fell behind.
+        It can be used in place of cv2.VideoCapture, as it has a compatible read method.
+
+        Args:
+            broadcaster (FrameBroadcaster): Source of frames.
+            last_sequence (int): Sequence number of the last frame, which this subscription should not get.
+        """
+        self._broadcaster = broadcaster
+        self._last_sequence = last_sequence
+        self._closed = False
+
+    def next_frame(self, timeout=None):
+        """Waits for the next frame. Returns (sequence, timestamp, frame), or None if no frame came within timeout,
+        or the broadcaster stopped.
+        """
+        item = self._broadcaster._next_frame(self._last_sequence, timeout)
+        if item:
+            self._last_sequence = item[0]
+        return item
+
+    @property
+    def is_running(self) -> bool:
+        """Returns True while the broadcaster captures frames, or tries to get them from the camera again.
+        """
+        return not self._closed and self._broadcaster.is_running
+
+    def read(self, timeout=FRAME_READ_TIMEOUT):
+        """Waits for the next frame. Returns (True, frame), or (False, None) as cv2.VideoCapture.read does on failure,
+        or if no frame came within timeout.
+        """
+        item = self.next_frame(timeout)
+        if not item:
+            return False, None
+        return True, item[2]
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._broadcaster._unsubscribe()
+
+    def release(self):
+        """Same as close, for compatibility with cv2.VideoCapture.
+        """
+        self.close()
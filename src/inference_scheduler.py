@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+from constants import INFERENCE_WORKERS, USE_POSE_WORKER_PROCESS, POSE_WORKER_MAX_FRAME_SHAPE
+
+
+def create_image_pose_estimator(model_path: str, use_worker_process=USE_POSE_WORKER_PROCESS,
+                                max_frame_shape=POSE_WORKER_MAX_FRAME_SHAPE):
+    """Creates an estimator in IMAGE running mode with its own landmarker, which can be used as a worker
+    of InferenceScheduler. If use_worker_process is True, it runs in a separate process, which accepts frames
+    up to max_frame_shape (e.g. resolution of the camera).
+    """
+    if use_worker_process:
+        from pose_worker import ProcessPoseEstimator
+        return ProcessPoseEstimator(max_frame_shape, running_mode="IMAGE", model_path=model_path)
+    from pose_estimation import LocalPoseEstimator, create_landmarker
+    return LocalPoseEstimator("IMAGE", pose_landmarker=create_landmarker("IMAGE", model_path))
+
+
+class InferenceScheduler:
+    def __init__(self, create_estimator, n_workers=INFERENCE_WORKERS) -> None:
+        """A class which shares a bounded pool of pose estimators between many clients (e.g. dance sessions).
+        Every client has at most one waiting frame, and a newer frame replaces it (latest frame wins).
+        Clients with waiting frames are served in round-robin order, so a client sending frames faster
+        does not take estimation time from the others.
+        Estimators are used by one worker thread each. They can be LocalPoseEstimators, or ProcessPoseEstimators,
+        which estimate in parallel without competing for GIL.
+
+        Args:
+            create_estimator (Callable[[], LocalPoseEstimator | ProcessPoseEstimator]): Creates estimator of one worker.
+            Frames of different clients come one after another, so estimators should not track poses between frames.
+            n_workers (int, optional): Number of worker threads and estimators. Defaults to INFERENCE_WORKERS.
+        """
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._ready = deque()
+        self._dropped = 0
+        self._running = True
+        self._local = threading.local()
+        self._estimators = [create_estimator() for _ in range(n_workers)]
+        self._workers = [threading.Thread(target=self._work, args=(estimator,), name=f"inference-{i}", daemon=True)
+                         for i, estimator in enumerate(self._estimators)]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def dropped(self) -> int:
+        """Returns number of frames, which were replaced by newer frames before estimation.
+        """
+        return self._dropped
+
+    @property
+    def inference_time(self) -> float:
+        """Returns number of seconds, which estimation of the frame took, while its callback is running.
+        Time the frame waited for a worker is not included. Returns None outside of callbacks.
+        """
+        return getattr(self._local, "inference_time", None)
+
+    @property
+    def n_workers(self) -> int:
+        return len(self._workers)
+
+    def submit(self, client_id, frame, timestamp, callback, on_dropped=None):
+        """Schedules estimation of RGB frame for a client. callback(landmarks, timestamp) is called from
+        a worker thread with the result. If the client has already a waiting frame, it is replaced,
+        and instead of its callback, its on_dropped() is called, if it was given.
+        """
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Inference scheduler is closed.")
+            replaced = self._pending.get(client_id)
+            if replaced:
+                self._dropped += 1
+            else:
+                self._ready.append(client_id)
+            self._pending[client_id] = (frame, timestamp, callback, on_dropped)
+            self._condition.notify()
+        if replaced and replaced[3]:
+            replaced[3]()
+
+    def cancel(self, client_id):
+        """Drops waiting frame of a client.
+        """
+        with self._condition:
+            cancelled = self._pending.pop(client_id, None)
+        if cancelled and cancelled[3]:
+            cancelled[3]()
+
+    def estimator(self, client_id) -> "ScheduledPoseEstimator":
+        """Returns an object with interface of LocalPoseEstimator, which estimates through this scheduler.
+        """
+        return ScheduledPoseEstimator(self, client_id)
+
+    def _work(self, estimator):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._ready or not self._running)
+                if not self._running:
+                    return
+                client_id = self._ready.popleft()
+                job = self._pending.pop(client_id, None)
+            if job is None:
+                # frame was cancelled
+                continue
+            frame, timestamp, callback, _ = job
+            start = time.perf_counter()
+            try:
+                landmarks = estimator.estimate(frame, timestamp)
+            except Exception as error:
+                print(f"Pose estimation failed: {error!r}")
+                landmarks = None
+            self._local.inference_time = time.perf_counter() - start
+            try:
+                callback(landmarks, timestamp)
+            finally:
+                self._local.inference_time = None
+
+    def close(self):
+        """Stops workers and closes estimators. Waiting frames are dropped.
+        """
+        with self._condition:
+            self._running = False
+            cancelled = list(self._pending.values())
+            self._pending.clear()
+            self._condition.notify_all()
+        for job in cancelled:
+            if job[3]:
+                job[3]()
+        for worker in self._workers:
+            worker.join()
+        for estimator in self._estimators:
+            estimator.close()
+
+
+class ScheduledPoseEstimator:
+    def __init__(self, scheduler: InferenceScheduler, client_id) -> None:
+        """Pose estimator of a single client of InferenceScheduler.
+        Has the same interface as LocalPoseEstimator, so it can be given to DanceManager.
+
+        Args:
+            scheduler (InferenceScheduler): Scheduler, which does the estimation.
+            client_id (Hashable): Id of client, e.g. id of dance session.
+        """
+        self._scheduler = scheduler
+        self._client_id = client_id
+
+    def estimate(self, frame, timestamp=None):
+        """Returns (N_RAW_NODES - 1, 3) array of world landmarks estimated from RGB frame, or None if no pose was found,
+        or the frame was replaced by a newer one.
+        """
+        done = threading.Event()
+        output = []
+        def on_result(landmarks, _):
+            output.append(landmarks)
+            done.set()
+        self._scheduler.submit(self._client_id, frame, timestamp, on_result, done.set)
+        done.wait()
+        return output[0] if output else None
+
+    @property
+    def inference_time(self) -> float:
+        """Returns number of seconds, which estimation of the frame took, while its callback is running, and None otherwise.
+        """
+        return self._scheduler.inference_time
+
+    def estimate_async(self, frame, timestamp, callback):
+        """Schedules estimation of RGB frame. callback(landmarks, timestamp) is called from another thread with the result.
+        """
+        self._scheduler.submit(self._client_id, frame, timestamp, callback)
+
+    def close(self):
+        self._scheduler.cancel(self._client_id)
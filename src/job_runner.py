@@ -0,0 +1,145 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from constants import MAX_JOBS, JOB_TIMEOUT
+
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+
+class Job:
+    def __init__(self, name: str, timeout=None) -> None:
+        """A single background task of JobRunner. Task gets cancel_event, and should end soon after it is set.
+
+        Args:
+            name (str): Name describing the task.
+            timeout (float, optional): Seconds after start, when the task is cancelled. Defaults to None (no timeout).
+        """
+        self._id = uuid.uuid4().hex
+        self._name = name
+        self._timeout = timeout
+        self._status = PENDING
+        self._started_at = None
+        self._finished_at = None
+        self._error = None
+        self._result = None
+        self._cancel_event = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def result(self):
+        return self._result
+
+    @property
+    def error(self):
+        return self._error
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        return self._cancel_event
+
+    @property
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self):
+        """Asks the task to stop. Task, which has not started yet, is never started.
+        """
+        self._cancel_event.set()
+
+    def wait(self, timeout=None) -> bool:
+        """Waits until the task ends. Returns False if it did not end within timeout.
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        """Returns a description of the job, which can be sent as JSON.
+        """
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = (self._finished_at or time.time()) - self._started_at
+        return {"id": self._id, "name": self._name, "status": self._status, "elapsed": elapsed,
+                "error": repr(self._error) if self._error else None}
+
+    def _run(self, function):
+        if self._cancel_event.is_set():
+            self._finish(CANCELLED)
+            return
+        self._status = RUNNING
+        self._started_at = time.time()
+        timer = None
+        if self._timeout:
+            timer = threading.Timer(self._timeout, self._on_timeout)
+            timer.daemon = True
+            timer.start()
+        try:
+            self._result = function(self._cancel_event)
+        except Exception as error:
+            self._error = error
+            self._finish(FAILED)
+            return
+        finally:
+            if timer:
+                timer.cancel()
+        if self._status == TIMED_OUT:
+            self._finish(TIMED_OUT)
+        else:
+            self._finish(CANCELLED if self._cancel_event.is_set() else FINISHED)
+
+    def _on_timeout(self):
+        self._status = TIMED_OUT
+        self._cancel_event.set()
+
+    def _finish(self, status):
+        self._status = status
+        self._finished_at = time.time()
+        self._done.set()
+
+
+class JobRunner:
+    def __init__(self, max_workers=MAX_JOBS, timeout=JOB_TIMEOUT) -> None:
+        """A class which runs long tasks (e.g. comparing a whole dance) in a bounded pool of background threads,
+        so that HTTP requests starting them return immediately. Jobs beyond max_workers wait for a free thread.
+
+        Args:
+            max_workers (int, optional): Maximal number of jobs running at once. Defaults to MAX_JOBS.
+            timeout (float, optional): Default timeout of a job in seconds. Defaults to JOB_TIMEOUT.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._timeout = timeout
+
+    def submit(self, name: str, function, timeout=None) -> Job:
+        """Starts function(cancel_event) in background. Returns its Job.
+
+        Args:
+            name (str): Name describing the task.
+            function (Callable[[threading.Event], Any]): Task. It should return soon after cancel_event is set.
+            timeout (float, optional): Seconds after start, when the task is cancelled. Defaults to timeout of the runner.
+        """
+        job = Job(name, timeout or self._timeout)
+        self._executor.submit(job._run, function)
+        return job
+
+    def shutdown(self, jobs=()):
+        """Cancels given jobs, and waits for all running jobs to end.
+        """
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=True)
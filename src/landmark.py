@@ -4,8 +4,12 @@ from math import isclose
 
 
 class Landmark:
+    __slots__ = ("_id", "_x", "_y", "_z")
+
     def __init__(self, id: int, x: float, y: float, z: float) -> None:
         """Class containing data for single point in 3D skeleton.
+        Landmarks keep only their id and coordinates in slots, without a per-instance dictionary,
+        and their name is looked up only when it is needed.
 
         Args:
             id (int): id of the point. This id is unique within single skeleton.
@@ -17,7 +21,6 @@ class Landmark:
         self._x = x
         self._y = y
         self._z = z
-        self._name = NODES_NAME[id]
 
     @property
     def id(self):
@@ -43,7 +46,7 @@ class Landmark:
         Returns:
             _type_: Name of landmark.
         """
-        return self._name
+        return NODES_NAME[self._id]
 
     def __bool__(self):
         return bool(self.x is not None and self.y is not None and self.z is not None)
@@ -54,6 +57,8 @@ class Landmark:
         return self.id == __value.id and isclose(self.x, __value.x) and isclose(self.y, __value.y) and isclose(self.z, __value.z)
 
 class RawLandmark(Landmark):
+    __slots__ = ()
+
     def __init__(self, id: int, x: float, y: float, z:float) -> None:
         """Landmark which is created when human pose is captured.
         Contains exactly the same data, as when this point was detected in a image.
@@ -69,6 +74,7 @@ class RawLandmark(Landmark):
 
 
 class EmptyLandmark(Landmark):
+    __slots__ = ()
 
     def __init__(self, id: int) -> None:
         """Class, which is used when human pose could not be estimated correctly.
@@ -82,6 +88,8 @@ class EmptyLandmark(Landmark):
 
 
 class SkeletonLandmark(Landmark):
+    __slots__ = ("_parent_landmark", "_distance")
+
     def __init__(self, raw_landmark: RawLandmark, parent_raw_landmark: RawLandmark,
                  parent_normalized_landmark, normalized_distance: float) -> None:
         """Type of Landmark which is used for Skeletons, when capturing data from image.
@@ -125,6 +133,7 @@ class SkeletonLandmark(Landmark):
 
 
 class AnchorSkeletonLandmark(SkeletonLandmark):
+    __slots__ = ()
 
     def __init__(self) -> None:
         """Type of SkeletonLandmark, which is used when creating Skeletons from image.
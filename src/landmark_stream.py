@@ -0,0 +1,103 @@
+import struct
+import numpy as np
+from constants import LANDMARK_STREAM_DTYPE, EVENT_HEARTBEAT_INTERVAL
+
+LANDMARK_STREAM_MAGIC = b"LMKS"
+LANDMARK_STREAM_VERSION = 1
+LANDMARK_STREAM_ANCHOR = 0xFFFF
+
+# Every message is prefixed with its length. Message of length 0 only keeps connection alive.
+_LENGTH = struct.Struct("<I")
+# magic, version, bytes per coordinate, number of nodes, number of bones
+_HEADER = struct.Struct("<4sBBHH")
+# timestamp of actual pose, timestamp of pattern pose
+_RECORD = struct.Struct("<dd")
+
+
+class LandmarkStreamEncoder:
+    def __init__(self, topology, dtype=LANDMARK_STREAM_DTYPE) -> None:
+        """A class packing normalized skeletons into compact binary messages, which browser can draw itself.
+        The stream starts with a header message with node ids and bones, and every next message is a record with
+        actual and pattern pose: two float64 timestamps followed by two (nodes, 3) arrays of coordinates
+        in little-endian float16 or float32. Missing coordinates are NaN.
+        Bones are pairs of indices into node ids, where LANDMARK_STREAM_ANCHOR is the anchor at the origin.
+
+        Args:
+            topology (SkeletonTopology): Topology, which defines nodes and bones of the stream.
+            dtype (str, optional): "float16" or "float32". Defaults to LANDMARK_STREAM_DTYPE.
+        """
+        self._dtype = np.dtype(dtype).newbyteorder("<")
+        if self._dtype.itemsize not in (2, 4) or self._dtype.kind != "f":
+            raise ValueError(f"Landmark stream does not support {dtype} coordinates.")
+        self._node_ids = tuple(topology.node_ids)
+        row_of_id = {id: row for row, id in enumerate(self._node_ids)}
+        bones = [(row_of_id.get(parent, LANDMARK_STREAM_ANCHOR), row_of_id[child])
+                 for child, parent in zip(topology.children, topology.parents)]
+        header = _HEADER.pack(LANDMARK_STREAM_MAGIC, LANDMARK_STREAM_VERSION, self._dtype.itemsize,
+                              len(self._node_ids), len(bones))
+        header += np.array(self._node_ids, dtype="<u2").tobytes() + np.array(bones, dtype="<u2").tobytes()
+        self._header = _LENGTH.pack(len(header)) + header
+        self._record_size = _RECORD.size + 2 * len(self._node_ids) * 3 * self._dtype.itemsize
+
+    @property
+    def node_ids(self):
+        return self._node_ids
+
+    @property
+    def header(self) -> bytes:
+        """Returns the first message of every stream.
+        """
+        return self._header
+
+    def rows_of(self, node_ids):
+        """Returns indices, which reorder positions with given node_ids columns into the order of the stream.
+        Nodes missing in node_ids get index -1.
+        """
+        column_of_id = {id: column for column, id in enumerate(node_ids)}
+        return np.array([column_of_id.get(id, -1) for id in self._node_ids])
+
+    def _pack_positions(self, positions, rows):
+        if rows is None:
+            return np.asarray(positions, dtype=self._dtype).tobytes()
+        packed = np.asarray(positions, dtype=self._dtype)[rows]
+        packed[rows == -1] = np.nan
+        return packed.tobytes()
+
+    def encode(self, timestamp, actual_positions, pattern_timestamp, pattern_positions,
+               actual_rows=None, pattern_rows=None) -> bytes:
+        """Returns a record message with actual and pattern pose.
+
+        Args:
+            timestamp (float): Timestamp of actual pose.
+            actual_positions (numpy.ndarray): (nodes, 3) normalized coordinates of actual pose.
+            pattern_timestamp (float): Timestamp of pattern pose.
+            pattern_positions (numpy.ndarray): (nodes, 3) normalized coordinates of pattern pose.
+            actual_rows (numpy.ndarray, optional): Result of rows_of, if actual pose has other order of nodes.
+            pattern_rows (numpy.ndarray, optional): Result of rows_of, if pattern pose has other order of nodes.
+        """
+        return b"".join((_LENGTH.pack(self._record_size),
+                         _RECORD.pack(timestamp, pattern_timestamp),
+                         self._pack_positions(actual_positions, actual_rows),
+                         self._pack_positions(pattern_positions, pattern_rows)))
+
+    def stream(self, subscription, heartbeat=EVENT_HEARTBEAT_INTERVAL):
+        """Generator of messages for one client: header, and then records published to subscription.
+        When no record comes for heartbeat seconds, an empty message is yielded, which lets the server notice
+        that client went away. Subscription is closed when generator is closed.
+
+        Args:
+            subscription (EventSubscription): Subscription to a bus, to which encoded records are published.
+            heartbeat (float, optional): Seconds between empty messages. Defaults to EVENT_HEARTBEAT_INTERVAL.
+        """
+        try:
+            yield self._header
+            while True:
+                item = subscription.get(heartbeat)
+                if item is None:
+                    if subscription.closed:
+                        break
+                    yield _LENGTH.pack(0)
+                    continue
+                yield item[1]
+        finally:
+            subscription.close()
@@ -0,0 +1,107 @@
+import threading
+import time
+import cv2
+from constants import MJPEG_QUALITY, MJPEG_MAX_WIDTH, MJPEG_MAX_HEIGHT, MJPEG_MAX_FPS
+
+
+class MJPEGStreamer:
+    def __init__(self, broadcaster, quality=MJPEG_QUALITY, max_width=MJPEG_MAX_WIDTH, max_height=MJPEG_MAX_HEIGHT,
+                 max_fps=MJPEG_MAX_FPS, mirror=True) -> None:
+        """A class which encodes camera preview to JPEG once per frame and shares the bytes with every viewer.
+        Encoding thread runs only while there is at least one viewer, and encodes at most max_fps frames per second,
+        so CPU spent on preview does not depend on number of viewers.
+
+        Args:
+            broadcaster (FrameBroadcaster): Source of camera frames.
+            quality (int, optional): JPEG quality, from 0 to 100. Defaults to MJPEG_QUALITY.
+            max_width (int, optional): Frames wider than this are downscaled. Defaults to MJPEG_MAX_WIDTH.
+            max_height (int, optional): Frames higher than this are downscaled. Defaults to MJPEG_MAX_HEIGHT.
+            max_fps (float, optional): Maximal number of encoded frames per second. Defaults to MJPEG_MAX_FPS.
+            mirror (bool, optional): If True, frames are flipped horizontally. Defaults to True.
+        """
+        self._broadcaster = broadcaster
+        self._encode_parameters = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._max_width = max_width
+        self._max_height = max_height
+        self._min_interval = 1 / max_fps if max_fps else 0
+        self._mirror = mirror
+        self._condition = threading.Condition()
+        self._viewers = 0
+        self._sequence = 0
+        self._chunk = None
+        self._thread = None
+
+    @property
+    def viewer_count(self) -> int:
+        return self._viewers
+
+    def stream(self):
+        """Generator of multipart/x-mixed-replace chunks for one viewer. Always yields the most recent encoded frame.
+        """
+        with self._condition:
+            self._viewers += 1
+            last_sequence = 0
+            if self._thread is None:
+                # frame left from previous run of encoder is stale
+                last_sequence = self._sequence
+                self._thread = threading.Thread(target=self._encode_frames, name="mjpeg-encoder", daemon=True)
+                self._thread.start()
+            thread = self._thread
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._sequence > last_sequence or not thread.is_alive(), 1)
+                    if self._sequence <= last_sequence:
+                        if not thread.is_alive():
+                            break
+                        continue
+                    last_sequence, chunk = self._sequence, self._chunk
+                yield chunk
+        finally:
+            with self._condition:
+                self._viewers -= 1
+
+    def _encode_frames(self):
+        subscription = self._broadcaster.subscribe()
+        last_encoded = 0
+        try:
+            while True:
+                with self._condition:
+                    if not self._viewers or not self._broadcaster.is_running:
+                        # decided under the lock, so a viewer coming now starts a new encoder instead of joining this one
+                        self._thread = None
+                        break
+                item = subscription.next_frame(timeout=1)
+                if not item:
+                    continue
+                now = time.monotonic()
+                if now - last_encoded < self._min_interval:
+                    continue
+                last_encoded = now
+
+                chunk = self._encode(item[2])
+                if chunk is None:
+                    continue
+                with self._condition:
+                    self._sequence += 1
+                    self._chunk = chunk
+                    self._condition.notify_all()
+        finally:
+            subscription.close()
+            with self._condition:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                self._condition.notify_all()
+
+    def _encode(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1, self._max_width / width if self._max_width else 1, self._max_height / height if self._max_height else 1)
+        if scale < 1:
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        if self._mirror:
+            frame = cv2.flip(frame, 1)
+        ret, buffer = cv2.imencode('.jpg', frame, self._encode_parameters)
+        if not ret:
+            return None
+        return (b'--frame\r\n'
+                b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from constants import PATTERN_CACHE_MAX_BYTES
+
+
+class PatternCache:
+    def __init__(self, loader, max_bytes=PATTERN_CACHE_MAX_BYTES) -> None:
+        """In-memory cache of pattern dances, keyed by path and modification time of data file.
+        Least recently used dances are evicted when total size of cached dances exceeds max_bytes.
+        A dance whose file was modified after loading is loaded again.
+
+        Args:
+            loader (Callable[[str], Dance]): Function creating a Dance from data file,
+            usually create_dance_from_data_file.
+            max_bytes (int, optional): Memory cap of cached dances. Defaults to PATTERN_CACHE_MAX_BYTES.
+        """
+        self._loader = loader
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._path_locks = {}
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __contains__(self, path) -> bool:
+        entry = self._entries.get(os.path.abspath(path))
+        return entry is not None and entry[0] == os.path.getmtime(path)
+
+    def get(self, path):
+        """Returns a Dance from data file at path, loading it only if it is not cached or the file has changed.
+        Concurrent calls for the same path load it only once.
+        """
+        key = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            path_lock = self._path_locks.setdefault(key, threading.Lock())
+
+        with path_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] == mtime:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                self._misses += 1
+
+            dance = self._loader(path)
+            self._put(key, mtime, dance)
+            return dance
+
+    def _put(self, key, mtime, dance):
+        size = dance.nbytes
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry:
+                self._nbytes -= old_entry[2]
+            self._entries[key] = (mtime, dance, size)
+            self._nbytes += size
+            while self._nbytes > self._max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_size
+
+    def warm(self, path) -> threading.Thread:
+        """Starts loading path in a background thread, so that a following get is a cache hit.
+        """
+        thread = threading.Thread(target=self._load_quietly, args=[path], daemon=True)
+        thread.start()
+        return thread
+
+    def preload(self, directory, extensions=(".dance", ".csv")) -> threading.Thread:
+        """Starts loading every dance from directory in a background thread.
+        When a dance is saved in several formats, only the first one from extensions is loaded.
+        """
+        def preload_all():
+            for path in find_dance_files(directory, extensions):
+                self._load_quietly(path)
+
+        thread = threading.Thread(target=preload_all, daemon=True)
+        thread.start()
+        return thread
+
+    def _load_quietly(self, path):
+        try:
+            self.get(path)
+        except (OSError, ValueError) as error:
+            print(f"Could not preload {path}: {error}")
+
+
+def find_dance_files(directory, extensions=(".dance", ".csv")):
+    """Returns paths of dance data files in directory, one per dance name, preferring earlier extensions.
+    """
+    if not os.path.isdir(directory):
+        return []
+    chosen = {}
+    for file_name in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(file_name)
+        if extension not in extensions:
+            continue
+        if name not in chosen or extensions.index(extension) < extensions.index(os.path.splitext(chosen[name])[1]):
+            chosen[name] = file_name
+    return [os.path.join(directory, file_name) for file_name in chosen.values()]
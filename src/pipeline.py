@@ -0,0 +1,101 @@
+import threading
+from collections import deque
+
+
+class LatestQueue:
+    def __init__(self, maxsize=1) -> None:
+        """Bounded, thread-safe queue with latest-frame-wins policy.
+        When the queue is full, putting a new item drops the oldest one, so a slow consumer
+        never builds up backlog and always gets the most recent data.
+
+        Args:
+            maxsize (int, optional): Maximal number of waiting items. Defaults to 1.
+        """
+        self._items = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """Returns number of items, which were dropped before anyone got them.
+        """
+        return self._dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self._items.maxlen:
+                self._dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Returns the oldest waiting item. Returns None if no item came within timeout, or if the queue is closed and empty.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._items or self._closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        """Marks that no more items will be put. Wakes up every waiting consumer.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class PipelineStage(threading.Thread):
+    def __init__(self, name: str, function, input_queue: LatestQueue = None, output_queue: LatestQueue = None,
+                 stop_event: threading.Event = None, poll_interval=0.1) -> None:
+        """A thread running one stage of a pipeline. It takes items from input_queue, passes them to function,
+        and puts results, which are not None, into output_queue.
+        A stage without input_queue is a source: function is called without arguments in a loop.
+        Stage ends when stop_event is set or input_queue is closed, and then closes its output_queue.
+        If function raises an exception, it is kept in error attribute and stop_event is set, stopping whole pipeline.
+
+        Args:
+            name (str): Name of the thread.
+            function (Callable): Function processing single item.
+            input_queue (LatestQueue, optional): Queue with items to process.
+            output_queue (LatestQueue, optional): Queue for results.
+            stop_event (threading.Event, optional): Event shared by all stages of a pipeline.
+            poll_interval (float, optional): How often (in seconds) stop_event is checked while waiting for items.
+        """
+        super().__init__(name=name, daemon=True)
+        self._function = function
+        self._input_queue = input_queue
+        self._output_queue = output_queue
+        self._stop_event = stop_event or threading.Event()
+        self._poll_interval = poll_interval
+        self._processed = 0
+        self.error = None
+
+    @property
+    def processed(self) -> int:
+        return self._processed
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                if self._input_queue is None:
+                    result = self._function()
+                else:
+                    item = self._input_queue.get(self._poll_interval)
+                    if item is None:
+                        if self._input_queue.closed:
+                            break
+                        continue
+                    result = self._function(item)
+                self._processed += 1
+                if result is not None and self._output_queue is not None:
+                    self._output_queue.put(result)
+        except Exception as error:
+            self.error = error
+            self._stop_event.set()
+        finally:
+            if self._output_queue is not None:
+                self._output_queue.close()
@@ -1,9 +1,11 @@
 import cv2
 import mediapipe as mp
 from mediapipe.framework.formats import landmark_pb2
+import threading
 import time
 import numpy as np
-from constants import LEFT_ANCHOR_CREATOR_NODE, RIGHT_ANCHOR_CREATOR_NODE, SKELETON_FILE, DEFAULT_PROJECTION, MODEL_PATH
+from constants import LEFT_ANCHOR_CREATOR_NODE, RIGHT_ANCHOR_CREATOR_NODE, SKELETON_FILE, DEFAULT_PROJECTION, MODEL_PATH,\
+    LIVE_STREAM_RESULT_TIMEOUT
 from skeleton import *
 
 
@@ -12,44 +14,168 @@ PoseLandmarker = mp.tasks.vision.PoseLandmarker
 PoseLandmarkerOptions = mp.tasks.vision.PoseLandmarkerOptions
 VisionRunningMode = mp.tasks.vision.RunningMode
 
-options = PoseLandmarkerOptions(
-    base_options=BaseOptions(model_asset_path=MODEL_PATH),
-    running_mode=VisionRunningMode.IMAGE)
-
-landmarker = PoseLandmarker.create_from_options(options)
+def create_landmarker(running_mode=VisionRunningMode.IMAGE, model_path=MODEL_PATH, result_callback=None):
+    """Creates a new PoseLandmarker.
+
+    Args:
+        running_mode (VisionRunningMode | str, optional): IMAGE estimates every frame from scratch, VIDEO and LIVE_STREAM
+        track a pose between frames. Defaults to IMAGE.
+        model_path (str, optional): Path to model file. Defaults to MODEL_PATH.
+        result_callback (Callable, optional): Required in LIVE_STREAM mode, called with (result, image, timestamp_ms).
+    """
+    if isinstance(running_mode, str):
+        running_mode = VisionRunningMode[running_mode]
+    options = PoseLandmarkerOptions(
+        base_options=BaseOptions(model_asset_path=model_path),
+        running_mode=running_mode,
+        result_callback=result_callback)
+    return PoseLandmarker.create_from_options(options)
+
+landmarker = None
+skeleton_topology = get_skeleton_topology(SKELETON_FILE)
+
+def get_landmarker():
+    """Returns the module landmarker (IMAGE mode), creating it on first use.
+    """
+    global landmarker
+    if landmarker is None:
+        landmarker = create_landmarker()
+    return landmarker
 
 mpDraw = mp.solutions.drawing_utils
 
 def estaminate_from_frame(frame):
     mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-    return landmarker.detect(mp_image)
+    return get_landmarker().detect(mp_image)
+
+class LocalPoseEstimator:
+    def __init__(self, running_mode=VisionRunningMode.IMAGE, model_path=MODEL_PATH, pose_landmarker=None) -> None:
+        """Runs pose estimation in the current process.
+        Has the same interface as ProcessPoseEstimator from pose_worker.
+        In VIDEO and LIVE_STREAM modes MediaPipe tracks a pose between frames instead of detecting it from scratch,
+        which requires monotonically increasing timestamps. Timestamps given by callers (e.g. time of a dance,
+        which starts from 0 in every session) are passed through shifted by an offset, which grows only
+        when they go backwards (e.g. a new session or frame range), so time between frames is kept.
+        In LIVE_STREAM mode estimation is asynchronous and MediaPipe drops frames, which come while it is busy.
+
+        Args:
+            running_mode (VisionRunningMode | str, optional): Running mode of landmarker. Defaults to IMAGE.
+            model_path (str, optional): Path to model file. Defaults to MODEL_PATH.
+            pose_landmarker (PoseLandmarker, optional): Landmarker to use. Defaults to the module landmarker in IMAGE mode,
+            and to a new landmarker in other modes.
+        """
+        if isinstance(running_mode, str):
+            running_mode = VisionRunningMode[running_mode]
+        self._running_mode = running_mode
+        self._submit_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._last_timestamp_ms = -1
+        self._offset_ms = 0
+        self._pending = {}
+        if pose_landmarker:
+            self._landmarker = pose_landmarker
+        elif running_mode == VisionRunningMode.IMAGE and model_path == MODEL_PATH:
+            self._landmarker = get_landmarker()
+        else:
+            callback = self._on_live_stream_result if running_mode == VisionRunningMode.LIVE_STREAM else None
+            self._landmarker = create_landmarker(running_mode, model_path, callback)
+
+    @property
+    def running_mode(self):
+        return self._running_mode
+
+    def _next_timestamp_ms(self, timestamp) -> int:
+        """Returns MediaPipe timestamp of a frame with the given caller timestamp (in seconds).
+        Frames without timestamp are stamped with the monotonic clock.
+        """
+        caller_ms = round(timestamp * 1000) if timestamp is not None else int(time.monotonic() * 1000)
+        timestamp_ms = self._offset_ms + caller_ms
+        if timestamp_ms <= self._last_timestamp_ms:
+            # caller's clock went back, so it is continued right after the last frame
+            self._offset_ms = self._last_timestamp_ms + 1 - caller_ms
+            timestamp_ms = self._last_timestamp_ms + 1
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def estimate(self, frame, timestamp=None):
+        """Returns (N_RAW_NODES - 1, 3) array of world landmarks estimated from RGB frame, or None if no pose was found.
+        In LIVE_STREAM mode waits up to LIVE_STREAM_RESULT_TIMEOUT for the result, and returns None if frame was dropped.
+        """
+        if self._running_mode == VisionRunningMode.LIVE_STREAM:
+            done = threading.Event()
+            output = []
+            def on_result(landmarks, _):
+                output.append(landmarks)
+                done.set()
+            self.estimate_async(frame, timestamp, on_result)
+            done.wait(LIVE_STREAM_RESULT_TIMEOUT)
+            return output[0] if output else None
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+        if self._running_mode == VisionRunningMode.VIDEO:
+            with self._submit_lock:
+                result = self._landmarker.detect_for_video(mp_image, self._next_timestamp_ms(timestamp))
+        else:
+            result = self._landmarker.detect(mp_image)
+        return landmarks_to_array(result.pose_world_landmarks)
+
+    def estimate_async(self, frame, timestamp, callback):
+        """Starts estimation of RGB frame. callback(landmarks, timestamp) is called with the result,
+        from another thread in LIVE_STREAM mode, and before returning in other modes.
+        In LIVE_STREAM mode this method never waits for detection, and callback is not called for dropped frames.
+        """
+        if self._running_mode != VisionRunningMode.LIVE_STREAM:
+            callback(self.estimate(frame, timestamp), timestamp)
+            return
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+        # results come from MediaPipe thread, which takes only self._lock
+        with self._submit_lock:
+            with self._lock:
+                timestamp_ms = self._next_timestamp_ms(timestamp)
+                self._pending[timestamp_ms] = (timestamp, callback)
+            self._landmarker.detect_async(mp_image, timestamp_ms)
+
+    def _on_live_stream_result(self, result, output_image, timestamp_ms):
+        with self._lock:
+            pending = self._pending.pop(timestamp_ms, None)
+            # frames sent before this one were dropped by MediaPipe
+            for dropped in [key for key in self._pending if key < timestamp_ms]:
+                del self._pending[dropped]
+        if pending:
+            timestamp, callback = pending
+            callback(landmarks_to_array(result.pose_world_landmarks), timestamp)
+
+    def close(self):
+        if self._landmarker is not landmarker:
+            self._landmarker.close()
+
+def landmarks_to_array(pose_landmarks):
+    """Converts landmarks of the first detected pose into a compact (N_RAW_NODES - 1, 3) float32 array.
+    Returns None if no pose was detected.
+    """
+    if not pose_landmarks:
+        return None
+    return np.array([[lm.x, lm.y, lm.z] for lm in pose_landmarks[0]], dtype=np.float32)
 
 def create_skeleton_from_raw_pose_landmarks(pose_landmarks, timestamp, dimension=DEFAULT_PROJECTION) -> RawSkeleton:
-    if pose_landmarks:
-        current_frame_data = []
-        for id, lm in enumerate(pose_landmarks[0]):
-            if dimension == "3D":
-                current_frame_data.append([id, lm.x, lm.y, lm.z])
-            elif dimension == "2D":
-                current_frame_data.append([id, lm.x, lm.y, 0])
-        left_anchor = current_frame_data[LEFT_ANCHOR_CREATOR_NODE]
-        right_anchor = current_frame_data[RIGHT_ANCHOR_CREATOR_NODE]
-
-        anchor_landmark_x = (left_anchor[1] + right_anchor[1]) / 2
-        anchor_landmark_y = (left_anchor[2] + right_anchor[2]) / 2
-
-        if dimension == "3D":
-            anchor_landmark_z = (left_anchor[3] + right_anchor[3]) / 2
-        elif dimension == "2D":
-            anchor_landmark_z = 0
-
-        current_frame_data.append([-1, anchor_landmark_x, anchor_landmark_y, anchor_landmark_z])
-        frame_skeleton = RawSkeleton(SKELETON_FILE, current_frame_data, timestamp)
-
-    else:
-        frame_skeleton = EmptySkeleton(SKELETON_FILE, timestamp)
-
-    return frame_skeleton
+    return create_skeleton_from_landmark_array(landmarks_to_array(pose_landmarks), timestamp, dimension)
+
+def create_skeleton_from_landmark_array(landmarks, timestamp, dimension=DEFAULT_PROJECTION) -> RawSkeleton:
+    """Creates a RawSkeleton from array returned by landmarks_to_array, or EmptySkeleton if it is None.
+    """
+    if landmarks is None:
+        return EmptySkeleton(skeleton_topology, timestamp)
+
+    current_frame_data = np.zeros((len(landmarks) + 1, 4))
+    current_frame_data[:-1, 0] = np.arange(len(landmarks))
+    current_frame_data[:-1, 1:3] = landmarks[:, :2]
+    if dimension == "3D":
+        current_frame_data[:-1, 3] = landmarks[:, 2]
+
+    anchor = (current_frame_data[LEFT_ANCHOR_CREATOR_NODE] + current_frame_data[RIGHT_ANCHOR_CREATOR_NODE]) / 2
+    current_frame_data[-1] = [-1, *anchor[1:]]
+    return RawSkeleton(skeleton_topology, current_frame_data, timestamp)
 
 def draw_landmarks_on_image(rgb_image, detection_result):
     pose_landmarks_list = detection_result.pose_landmarks
@@ -0,0 +1,208 @@
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from constants import POSE_WORKER_SLOTS, MODEL_PATH, POSE_WORKER_POLL_INTERVAL
+
+
+def _worker_main(requests, results, running_mode, model_path):
+    """Main loop of worker process. Frames are read from shared memory, landmarks are sent back through results queue.
+    """
+    from pose_estimation import LocalPoseEstimator, create_landmarker
+
+    # spawned process inherits nothing, so it creates its own landmarker
+    estimator = LocalPoseEstimator(running_mode, pose_landmarker=create_landmarker(running_mode, model_path))
+    memory = None
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, memory_name, slot, slot_size, shape, timestamp = request
+        if memory is None or memory.name != memory_name:
+            if memory is not None:
+                memory.close()
+            # spawned process shares resource tracker of the parent process, which owns and unlinks the memory
+            memory = shared_memory.SharedMemory(name=memory_name)
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf, offset=slot * slot_size)
+        try:
+            results.put((request_id, estimator.estimate(frame, timestamp), None))
+        except Exception as error:
+            results.put((request_id, None, repr(error)))
+        del frame
+    if memory is not None:
+        memory.close()
+
+
+class ProcessPoseEstimator:
+    def __init__(self, max_frame_shape=None, n_slots=POSE_WORKER_SLOTS, running_mode="VIDEO", model_path=MODEL_PATH) -> None:
+        """Runs pose estimation in a separate worker process, so that it does not compete for GIL
+        with scoring and web server.
+        Frames are handed over through a ring of slots in shared memory, and only a compact landmark
+        array is sent back. A slot is reused only after the worker has finished with it.
+        Worker process is started with spawn on the first frame, so creating this class has no side effects
+        (e.g. when a module creating it is imported again in a spawned process). If the worker process dies,
+        waiting for it raises RuntimeError instead of blocking forever.
+
+        Args:
+            max_frame_shape (Tuple[int, int, int], optional): Shape of the biggest RGB frame, which will be estimated.
+            If not given, shape of the first frame is used, and bigger frames are rejected.
+            n_slots (int, optional): Number of frames, which can wait for or be in estimation at once.
+            Defaults to POSE_WORKER_SLOTS.
+            running_mode (str, optional): "IMAGE" or "VIDEO" running mode of landmarker in worker process.
+            Defaults to "VIDEO", which tracks a pose between frames.
+            model_path (str, optional): Path to model file. Defaults to MODEL_PATH.
+        """
+        if running_mode not in ("IMAGE", "VIDEO"):
+            raise ValueError(f"Running mode {running_mode} is not supported in worker process.")
+        self._running_mode = running_mode
+        self._model_path = model_path
+        self._n_slots = n_slots
+        self._slot_size = None
+        self._memory = None
+        if max_frame_shape:
+            self._allocate(int(np.prod(max_frame_shape)))
+
+        self._free_slots = queue.Queue()
+        for slot in range(n_slots):
+            self._free_slots.put(slot)
+        self._slot_of_request = {}
+        self._callbacks = {}
+        self._finished = {}
+        self._condition = threading.Condition()
+        self._next_request_id = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._requests = None
+        self._results = None
+        self._process = None
+        self._collector = None
+
+    def _start(self):
+        """Starts worker process and collector thread. Must be called with self._condition held.
+        """
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = self._context.Process(target=_worker_main, name="pose-worker", daemon=True,
+                                              args=(self._requests, self._results, self._running_mode, self._model_path))
+        self._process.start()
+        self._collector = threading.Thread(target=self._collect_results, name="pose-worker-results", daemon=True)
+        self._collector.start()
+
+    def _check_worker(self):
+        if self._process is not None and not self._process.is_alive():
+            raise RuntimeError(f"Pose worker process ended unexpectedly with exit code {self._process.exitcode}.")
+
+    def _allocate(self, slot_size: int):
+        self._slot_size = slot_size
+        self._memory = shared_memory.SharedMemory(create=True, size=slot_size * self._n_slots)
+
+    def submit(self, frame, timestamp=None, callback=None) -> int:
+        """Copies RGB frame into a free slot and sends it to the worker. Blocks while all slots are in use.
+        Returns id of request, which is passed to result. If callback is given, it is called with
+        (landmarks, timestamp) from another thread instead, and result must not be used.
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        with self._condition:
+            if self._memory is None:
+                self._allocate(frame.nbytes)
+            if self._process is None:
+                self._start()
+        if frame.nbytes > self._slot_size:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit in shared memory slot of {self._slot_size} bytes.")
+
+        while True:
+            self._check_worker()
+            try:
+                slot = self._free_slots.get(timeout=POSE_WORKER_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                pass
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._memory.buf, offset=slot * self._slot_size)
+        view[...] = frame
+        del view
+        with self._condition:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            self._slot_of_request[request_id] = slot
+            if callback:
+                self._callbacks[request_id] = (timestamp, callback)
+        self._requests.put((request_id, self._memory.name, slot, self._slot_size, frame.shape, timestamp))
+        return request_id
+
+    def result(self, request_id: int, timeout=None):
+        """Waits for landmarks of submitted frame. Returns (N_RAW_NODES - 1, 3) array, or None if no pose was found.
+        Raises TimeoutError if result did not come within timeout, and RuntimeError if estimation failed
+        or worker process died.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while request_id not in self._finished:
+                self._check_worker()
+                wait_time = POSE_WORKER_POLL_INTERVAL
+                if deadline is not None:
+                    wait_time = min(wait_time, deadline - time.monotonic())
+                    if wait_time <= 0:
+                        raise TimeoutError(f"Pose estimation of request {request_id} took too long.")
+                self._condition.wait(wait_time)
+            landmarks, error = self._finished.pop(request_id)
+        if error:
+            raise RuntimeError(f"Pose estimation failed in worker process: {error}")
+        return landmarks
+
+    def estimate(self, frame, timestamp=None):
+        """Returns (N_RAW_NODES - 1, 3) array of world landmarks estimated from RGB frame, or None if no pose was found.
+        """
+        return self.result(self.submit(frame, timestamp))
+
+    def estimate_async(self, frame, timestamp, callback):
+        """Sends RGB frame to the worker. callback(landmarks, timestamp) is called from another thread with the result.
+        """
+        self.submit(frame, timestamp, callback)
+
+    def _collect_results(self):
+        while True:
+            try:
+                message = self._results.get(timeout=POSE_WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                # all results of a stopped or dead worker were collected
+                if not self._process.is_alive():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            request_id, landmarks, error = message
+            with self._condition:
+                self._free_slots.put(self._slot_of_request.pop(request_id))
+                pending = self._callbacks.pop(request_id, None)
+                if not pending:
+                    self._finished[request_id] = (landmarks, error)
+                    self._condition.notify_all()
+            if pending:
+                timestamp, callback = pending
+                if error:
+                    print(f"Pose estimation failed in worker process: {error}")
+                callback(landmarks, timestamp)
+
+    def close(self):
+        """Stops the worker process and releases shared memory.
+        """
+        if self._process is not None:
+            if self._process.is_alive():
+                self._requests.put(None)
+                self._process.join(timeout=5)
+                if self._process.is_alive():
+                    self._process.terminate()
+            if self._process.exitcode == 0:
+                # wakes up collector; a dead worker might have left the queue locked
+                self._results.put(None)
+            self._collector.join(timeout=POSE_WORKER_POLL_INTERVAL + 1)
+            # worker may have died without reading all requests
+            self._requests.cancel_join_thread()
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
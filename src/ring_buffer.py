@@ -0,0 +1,99 @@
+import math
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, dtype=np.float64) -> None:
+        """Fixed-capacity buffer of the most recent items, preallocated as a numpy array.
+        When the buffer is full, appending an item overwrites the oldest one, so memory never grows.
+
+        Args:
+            capacity (int): Maximal number of kept items.
+            dtype (numpy.dtype, optional): Type of items. Structured types keep records of many fields. Defaults to float64.
+        """
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._start = 0
+        self._size = 0
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def total(self) -> int:
+        """Returns number of items appended since creation or the last clear, including overwritten ones.
+        """
+        return self._total
+
+    def append(self, item):
+        index = (self._start + self._size) % len(self._data)
+        self._data[index] = item
+        if self._size < len(self._data):
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % len(self._data)
+        self._total += 1
+
+    def last(self):
+        """Returns the most recent item, or None if the buffer is empty.
+        """
+        if not self._size:
+            return None
+        return self._data[(self._start + self._size - 1) % len(self._data)]
+
+    def values(self):
+        """Returns a copy of kept items, from the oldest to the most recent.
+        """
+        stop = self._start + self._size
+        if stop <= len(self._data):
+            return self._data[self._start:stop].copy()
+        return np.concatenate((self._data[self._start:], self._data[:stop - len(self._data)]))
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+        self._total = 0
+
+
+class StreamingAggregate:
+    def __init__(self) -> None:
+        """Count, mean, minimum and maximum of a stream of numbers, updated in constant time and memory
+        for every value, without keeping the values.
+        """
+        self.reset()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        """Returns the mean of added values, or None if nothing was added.
+        """
+        return self._sum / self._count if self._count else None
+
+    @property
+    def min(self) -> float:
+        return self._min if self._count else None
+
+    @property
+    def max(self) -> float:
+        return self._max if self._count else None
+
+    def add(self, value: float):
+        self._count += 1
+        self._sum += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+
+    def reset(self):
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def to_dict(self) -> dict:
+        return {"count": self._count, "mean": self.mean, "min": self.min, "max": self.max}
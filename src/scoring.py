@@ -0,0 +1,144 @@
+import numpy as np
+
+LIMBS = {#orientation from their perspective
+    #key -> [points, weight(for cumulative error)]
+    "right_arm":  [[14,12,24], 0.7],
+    "right_hand": [[16,12,24], 1],
+    "left_arm":   [[13,11,23], 0.7],
+    "left_hand":  [[15,11,23], 1],
+
+    "right_leg":  [[23,24,26], 0.2],
+    "right_foot": [[23,24,28], 0.2],
+    "left_leg":   [[24,23,25], 0.2],
+    "left_foot":  [[24,23,27], 0.2]
+    }
+
+COS, SIN, ANGLE = 0, 1, 2
+
+
+class LimbScorer:
+    def __init__(self, node_ids, limbs=LIMBS) -> None:
+        """A class which compares poses by angles of limbs.
+        Limb specification is compiled once into arrays of column indices, so angles of all limbs
+        of any number of frames are computed in a single batch of array operations.
+
+        Args:
+            node_ids (List[int]): Ids of Landmarks, in order of columns of arrays which will be scored.
+            limbs (dict, optional): Maps name of a limb to [[first, middle, last], weight]. Angle of a limb
+            is the angle at the middle point. Defaults to LIMBS.
+        """
+        node_index = {id: index for index, id in enumerate(node_ids)}
+        self._limb_names = list(limbs)
+        points = np.array([[node_index[id] for id in limbs[limb][0]] for limb in self._limb_names])
+        self._first, self._middle, self._last = points.T
+        self._weights = np.array([limbs[limb][1] for limb in self._limb_names], dtype=np.float64)
+        self._total_weight = self._weights.sum()
+
+    @property
+    def limb_names(self):
+        return self._limb_names
+
+    @property
+    def weights(self):
+        return self._weights
+
+    def limb_angles(self, positions):
+        """Returns cosine, sine and angle (in degrees) of every limb.
+        Only x and y coordinates are used, as in Skeleton.get_cossin.
+
+        Args:
+            positions (numpy.ndarray): Array of shape (..., nodes, 3) of normalized coordinates.
+
+        Returns:
+            numpy.ndarray: Array of shape (..., limbs, 3), where the last axis holds cos, sin and angle.
+            Limbs with missing coordinates are NaN.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        middle = positions[..., self._middle, :2]
+        u = positions[..., self._first, :2] - middle
+        v = positions[..., self._last, :2] - middle
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            lengths = np.hypot(u[..., 0], u[..., 1]) * np.hypot(v[..., 0], v[..., 1])
+            cos = (u[..., 0]*v[..., 0] + u[..., 1]*v[..., 1]) / lengths
+            sin = (u[..., 0]*v[..., 1] - u[..., 1]*v[..., 0]) / lengths
+        angle = np.degrees(np.arccos(np.clip(cos, -1, 1)))
+        return np.stack([cos, sin, angle], axis=-1)
+
+    def score(self, actual_angles, pattern_angles, delays, timestamp: float) -> "FrameScore":
+        """Compares angles of one pose from camera with angles of pattern poses taken at several delays.
+
+        Args:
+            actual_angles (numpy.ndarray): Array of shape (limbs, 3) returned by limb_angles.
+            pattern_angles (numpy.ndarray): Array of shape (delays, limbs, 3) returned by limb_angles.
+            delays (numpy.ndarray): Delays for which pattern poses were taken.
+            timestamp (float): Timestamp of the pose from camera.
+        """
+        differences = np.abs(actual_angles[..., ANGLE] - pattern_angles[..., ANGLE])
+        errors = differences @ self._weights / self._total_weight
+        return FrameScore(self, timestamp, np.asarray(delays), errors, differences)
+
+
+class FrameScore:
+    def __init__(self, scorer: LimbScorer, timestamp: float, delays, errors, differences) -> None:
+        """Result of comparing a single pose from camera with pattern poses for several delays.
+        Delays for which any of the poses was incomplete have NaN error and are skipped.
+
+        Args:
+            scorer (LimbScorer): Scorer which created this result.
+            timestamp (float): Timestamp of the pose from camera.
+            delays (numpy.ndarray): Vector of delays.
+            errors (numpy.ndarray): Weighted mean angle difference (in degrees) for every delay.
+            differences (numpy.ndarray): Array of shape (delays, limbs) with angle difference of every limb.
+        """
+        self._scorer = scorer
+        self._timestamp = timestamp
+        self._delays = delays
+        self._errors = errors
+        self._differences = differences
+        self._scored = ~np.isnan(errors)
+
+    @property
+    def timestamp(self):
+        return self._timestamp
+
+    @property
+    def delays(self):
+        return self._delays[self._scored]
+
+    @property
+    def scores(self):
+        """Returns errors of all delays, which could be scored.
+        """
+        return self._errors[self._scored]
+
+    def __bool__(self) -> bool:
+        return bool(self._scored.any())
+
+    @property
+    def best(self) -> float:
+        return float(self.scores.min())
+
+    @property
+    def worst(self) -> float:
+        return float(self.scores.max())
+
+    @property
+    def base(self) -> float:
+        """Returns error of the first scored delay.
+        """
+        return float(self.scores[0])
+
+    def details(self, delay_index=0) -> str:
+        """Returns a readable summary of angle differences of every limb for one of scored delays.
+        """
+        differences = self._differences[self._scored][delay_index]
+        output = ""
+        for limb, angle in zip(self._scorer.limb_names, differences):
+            even = " "
+            if angle < 10:
+                even = "  "
+            elif angle >= 100:
+                even = ""
+            output += f"{limb}: {int(angle)}{even} | "
+        return f"{int(self.timestamp*1000)}ms, Res (deg): | {output}"
@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from constants import MAX_SESSIONS, SESSION_IDLE_TIMEOUT
+
+
+class DanceSession:
+    def __init__(self, session_id: str, dance_manager) -> None:
+        """State of one dancer: DanceManager with its own frame source, pattern, actual dance and score stream.
+
+        Args:
+            session_id (str): Id of the session.
+            dance_manager (DanceManager): DanceManager used only by this session. It is closed with the session.
+        """
+        self._id = session_id
+        self._dance_manager = dance_manager
+        self._last_access = time.monotonic()
+        self.pattern_dance_path = None
+        self.job = None
+        # guards checking and replacing job, which requests handled on different threads do at once
+        self.job_lock = threading.Lock()
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def dance_manager(self):
+        return self._dance_manager
+
+    @property
+    def idle_time(self) -> float:
+        """Returns number of seconds since the session was last used.
+        """
+        return time.monotonic() - self._last_access
+
+    @property
+    def is_active(self) -> bool:
+        """Returns True if the session is dancing or has a job, which has not ended.
+        """
+        return self._dance_manager.is_video_being_played or bool(self.job and not self.job.is_done)
+
+    def touch(self):
+        self._last_access = time.monotonic()
+
+    def close(self):
+        with self.job_lock:
+            if self.job:
+                self.job.cancel()
+        self._dance_manager.close()
+
+
+class SessionManager:
+    def __init__(self, create_dance_manager, scheduler=None, max_sessions=MAX_SESSIONS,
+                 idle_timeout=SESSION_IDLE_TIMEOUT) -> None:
+        """A class which keeps isolated dance sessions, so that many dancers can use one server at once.
+
+        Args:
+            create_dance_manager (Callable[[pose_estimator], DanceManager]): Creates DanceManager of a new session,
+            with its own frame source, and with given pose estimator (None when there is no scheduler).
+            scheduler (InferenceScheduler, optional): Scheduler sharing pose estimators fairly between sessions.
+            If not given, every session runs its own estimator.
+            max_sessions (int, optional): Maximal number of sessions. Defaults to MAX_SESSIONS.
+            idle_timeout (float, optional): Seconds after which an unused session, which is not dancing,
+            can be closed to make place for a new one. Defaults to SESSION_IDLE_TIMEOUT.
+        """
+        self._create_dance_manager = create_dance_manager
+        self._scheduler = scheduler
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str) -> DanceSession:
+        """Returns a session with given id, or None if there is no such session.
+        """
+        session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+
+    def create(self) -> DanceSession:
+        """Creates a new session. Closes idle sessions if there are too many of them.
+        Raises RuntimeError if all sessions are in use.
+        """
+        self.close_idle()
+        with self._lock:
+            if len(self._sessions) >= self._max_sessions:
+                raise RuntimeError(f"All {self._max_sessions} dance sessions are in use.")
+            session_id = uuid.uuid4().hex
+            pose_estimator = self._scheduler.estimator(session_id) if self._scheduler else None
+            session = DanceSession(session_id, self._create_dance_manager(pose_estimator))
+            self._sessions[session_id] = session
+        return session
+
+    def close(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            session.close()
+
+    def close_idle(self):
+        """Closes sessions, which are not dancing and were not used for idle_timeout.
+        """
+        with self._lock:
+            idle = [session for session in self._sessions.values()
+                    if not session.is_active and session.idle_time > self._idle_timeout]
+            for session in idle:
+                del self._sessions[session.id]
+        for session in idle:
+            session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
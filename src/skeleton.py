@@ -1,7 +1,117 @@
 import csv
 import math
+import numpy as np
+from functools import lru_cache
 from landmark import *
 from math import isclose
+from constants import SKELETON_FILE, N_RAW_NODES
+
+
+class SkeletonTopology:
+    def __init__(self, children, parents, distances) -> None:
+        """Compiled description of how to build a normalized skeleton from raw pose landmarks.
+        Bones are kept in topological order (every parent before its children), and ancestry of every node
+        is stored as a matrix, so a whole skeleton is normalized with a few array operations.
+
+        Args:
+            children (List[int]): Id of child Landmark of every bone.
+            parents (List[int]): Id of parent Landmark of every bone. -1 is the anchor.
+            distances (List[float]): Normalized length of every bone.
+        """
+        order = self._topological_order(children, parents)
+        self._children = np.array([children[i] for i in order])
+        self._parents = np.array([parents[i] for i in order])
+        self._distances = np.array([distances[i] for i in order], dtype=np.float64)
+        self._node_ids = tuple(sorted(children))
+
+        bone_index = {child: bone for bone, child in enumerate(self._children)}
+        self._ancestry = np.zeros((len(self._node_ids), len(self._children)))
+        for row, id in enumerate(self._node_ids):
+            while id != -1:
+                bone = bone_index[id]
+                self._ancestry[row, bone] = 1
+                id = self._parents[bone]
+
+    @staticmethod
+    def _topological_order(children, parents):
+        order = []
+        placed = {-1}
+        remaining = list(range(len(children)))
+        while remaining:
+            ready = [i for i in remaining if parents[i] in placed]
+            if not ready:
+                raise ValueError("Skeleton description contains a cycle or a node without parent.")
+            order += ready
+            placed.update(children[i] for i in ready)
+            remaining = [i for i in remaining if i not in ready]
+        return order
+
+    @classmethod
+    def from_file(cls, skeleton_data_file: str) -> "SkeletonTopology":
+        """Creates a SkeletonTopology from csv file with child, parent and distance columns.
+        """
+        with open(skeleton_data_file) as handle:
+            rows = list(csv.DictReader(handle, delimiter=","))
+        return cls([int(row["child"]) for row in rows],
+                   [int(row["parent"]) for row in rows],
+                   [float(row["distance"]) for row in rows])
+
+    @property
+    def node_ids(self):
+        """Returns a sorted tuple of ids of every non-anchor Landmark.
+        This is the order in which Landmarks are kept in normalized Skeletons and in dance data files.
+        """
+        return self._node_ids
+
+    @property
+    def children(self):
+        return self._children
+
+    @property
+    def parents(self):
+        return self._parents
+
+    @property
+    def distances(self):
+        return self._distances
+
+    @staticmethod
+    def raw_rows(ids):
+        """Returns rows of raw coordinate array used for given raw Landmark ids. Anchor (-1) is kept in the last row.
+        """
+        ids = np.asarray(ids)
+        return np.where(ids < 0, N_RAW_NODES - 1, ids)
+
+    def normalize(self, raw_coordinates):
+        """Moves every Landmark, so that each bone keeps its direction from raw data,
+        but has its normalized length. Anchor is placed at (0, 0, 0).
+
+        Args:
+            raw_coordinates (numpy.ndarray): Array of shape (N_RAW_NODES, 3) of raw coordinates,
+            in rows given by raw_rows.
+
+        Returns:
+            numpy.ndarray: Array of shape (len(node_ids), 3) of normalized coordinates.
+        """
+        bones = raw_coordinates[self.raw_rows(self._children)] - raw_coordinates[self.raw_rows(self._parents)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bones *= (self._distances / np.linalg.norm(bones, axis=1))[:, np.newaxis]
+        return self._ancestry @ bones
+
+
+@lru_cache(maxsize=None)
+def get_skeleton_topology(skeleton_data_file: str = SKELETON_FILE) -> SkeletonTopology:
+    """Returns SkeletonTopology of skeleton_data_file. Every file is read only once.
+    """
+    return SkeletonTopology.from_file(skeleton_data_file)
+
+
+@lru_cache(maxsize=64)
+def _get_landmark_index(ids) -> dict:
+    """Returns a dictionary from Landmark id to its position in a list of Landmarks with given ids.
+    Skeletons with the same ids share one dictionary. If an id repeats, its first position is kept.
+    """
+    return {id: index for index, id in reversed(list(enumerate(ids)))}
 
 
 class Skeleton:
@@ -25,6 +135,26 @@ class Skeleton:
                 self._landmarks.append(Landmark(id, float(x), float(y), float(z)))
             else:
                 self._landmarks.append(EmptyLandmark(id))
+        self._index = _get_landmark_index(tuple(landmark.id for landmark in self._landmarks))
+
+    @classmethod
+    def from_coordinates(cls, node_ids, coordinates, timestamp: float) -> "Skeleton":
+        """Creates a Skeleton from already normalized coordinates.
+
+        Args:
+            node_ids (List[int]): Ids of Landmarks, one for every row of coordinates.
+            coordinates (numpy.ndarray): Array of shape (len(node_ids), 3). Rows containing NaN
+            are turned into EmptyLandmarks.
+            timestamp (float): A number, describing in which second there was a pose, which is described by this class.
+        """
+        skeleton = Skeleton([], timestamp)
+        for id, (x, y, z) in zip(node_ids, coordinates.tolist()):
+            if math.isnan(x) or math.isnan(y) or math.isnan(z):
+                skeleton._landmarks.append(EmptyLandmark(id))
+            else:
+                skeleton._landmarks.append(Landmark(id, x, y, z))
+        skeleton._index = _get_landmark_index((-1,) + tuple(node_ids))
+        return skeleton
 
     def landmarks(self):
         """Returns a list of Landmarks of this Skeleton.
@@ -32,23 +162,18 @@ class Skeleton:
         return self._landmarks
 
     def get_landmark_by_id(self, id) -> Landmark:
-        """Returns one of Landmarks of this Skeleton, which has the given id.
+        """Returns one of Landmarks of this Skeleton, which has the given id, or None if there is no such Landmark.
         """
-        return self._get_landmark_by_id(self.landmarks(), id)
-
-    def _get_landmark_by_id(self, landmark_list, id):
-        for landmark in landmark_list:
-            if landmark.id == id:
-                return landmark
+        landmarks = self.landmarks()
+        index = self._index.get(id)
+        return landmarks[index] if index is not None else None
 
     def get_cossin(self, id) -> [float, float]:
         """returns a cosine and sine from an angle betwen three poins"""
-        x1 = self.get_landmark_by_id(id[0]).x
-        y1 = self.get_landmark_by_id(id[0]).y
-        x2 = self.get_landmark_by_id(id[1]).x
-        y2 = self.get_landmark_by_id(id[1]).y
-        x3 = self.get_landmark_by_id(id[2]).x
-        y3 = self.get_landmark_by_id(id[2]).y
+        first, middle, last = (self.get_landmark_by_id(landmark_id) for landmark_id in id[:3])
+        x1, y1 = first.x, first.y
+        x2, y2 = middle.x, middle.y
+        x3, y3 = last.x, last.y
 
         ux, uy = x1 - x2, y1 - y2
         vx, vy = x3 - x2, y3 - y2
@@ -92,66 +217,88 @@ class Skeleton:
 
 class RawSkeleton(Skeleton):
 
-    def __init__(self, skeleton_data_file: str, raw_landmarks_data, timestamp: float) -> None:
+    def __init__(self, skeleton_data_file, raw_landmarks_data, timestamp: float) -> None:
         """A type of Skeleton, which is suitable for creating pose directly form image pose estimator.
         This class gets a data rquried to created list of Landmarks, as normal Skeleon class, but it also normalizes
         distances of these Landmarks based on skeleton_data_file.
 
         Args:
-            skeleton_data_file (str): Path to csv file, which contain data about how to build a skeleton.
+            skeleton_data_file (str | SkeletonTopology): Path to csv file, which contain data about how to build a skeleton,
+            or already compiled SkeletonTopology.
             raw_landmarks_data (List[int, float, float, float]): A list of containers, which have 4 elements
             describing single Landmark: its id and x, y and z coordnates. From this list.
             timestamp (float): A number, describing in which second there was a pose, which is described by this class.
         """
-        self._raw_landmarks = []
-        for raw_landmark_data in raw_landmarks_data:
-            id, x, y, z = raw_landmark_data
-            new_landmark = RawLandmark(id, float(x), float(y), float(z))
-            self._raw_landmarks.append(new_landmark)
+        topology = _get_topology(skeleton_data_file)
+        raw_landmarks_data = np.asarray(raw_landmarks_data, dtype=np.float64)
+        self._raw_ids = raw_landmarks_data[:, 0].astype(int)
+        self._raw_coordinates = np.full((N_RAW_NODES, 3), np.nan)
+        self._raw_coordinates[topology.raw_rows(self._raw_ids)] = raw_landmarks_data[:, 1:]
         self._timestamp = timestamp
 
-        anchor = AnchorSkeletonLandmark()
-        self._landmarks = [anchor]
-        with open(skeleton_data_file) as handle:
-            csv_reader = csv.DictReader(handle, delimiter=",")
-            for row in csv_reader:
-                raw_child    = self.get_raw_landmark_by_id(int(row["child"]))
-                raw_parent   = self.get_raw_landmark_by_id(int(row["parent"]))
-                norm_parent  = self.get_landmark_by_id(int(row["parent"]))
-                distance     = float(row["distance"])
-                new_landmark = SkeletonLandmark(raw_child, raw_parent, norm_parent, distance)
-                self._landmarks.append(new_landmark)
+        self._node_ids = topology.node_ids
+        self._coordinates = topology.normalize(self._raw_coordinates)
+        self._index = _get_landmark_index((-1,) + self._node_ids)
+        self._landmarks = None
+        self._raw_landmarks = None
+        self._raw_index = None
 
-        self._landmarks.sort(key=lambda x: x.id)
+    @property
+    def node_ids(self):
+        return self._node_ids
+
+    @property
+    def coordinates(self):
+        """Returns (nodes, 3) array of normalized coordinates, in order of node_ids.
+        """
+        return self._coordinates
 
+    def landmarks(self):
+        if self._landmarks is None:
+            self._landmarks = Skeleton.from_coordinates(self._node_ids, self._coordinates, self._timestamp).landmarks()
+        return self._landmarks
 
     def raw_landmarks(self):
         """Returns a list of RawLandmarks which have data taken directly from image.
         """
+        if self._raw_landmarks is None:
+            rows = SkeletonTopology.raw_rows(self._raw_ids)
+            self._raw_landmarks = [RawLandmark(id, x, y, z)
+                                   for id, (x, y, z) in zip(self._raw_ids.tolist(), self._raw_coordinates[rows].tolist())]
+            self._raw_index = _get_landmark_index(tuple(self._raw_ids.tolist()))
         return self._raw_landmarks
 
     def get_raw_landmark_by_id(self, id) -> RawLandmark:
-        """Returns one of RawLandmarks of this Skeleton, which has the given id.
+        """Returns one of RawLandmarks of this Skeleton, which has the given id, or None if there is no such Landmark.
         """
-        return self._get_landmark_by_id(self.raw_landmarks(), id)
+        raw_landmarks = self.raw_landmarks()
+        index = self._raw_index.get(id)
+        return raw_landmarks[index] if index is not None else None
 
 
 class EmptySkeleton(Skeleton):
 
-    def __init__(self, skeleton_data_file: str, timestamp: float) -> None:
+    def __init__(self, skeleton_data_file, timestamp: float) -> None:
         """Class, which is used when human pose could not be estimated correctly from image.
         This class is a placeholder for Dance class, so that there will be information that there wasn't
         detected pose on given time.
 
         Args:
-            skeleton_data_file (_type_):  Path to csv file, which contain data about how to build a skeleton.
+            skeleton_data_file (str | SkeletonTopology):  Path to csv file, which contain data about how to build a skeleton,
+            or already compiled SkeletonTopology.
             timestamp (float): A number, describing in which second pose has not been detected.
         """
         self._timestamp = timestamp
 
+        node_ids = _get_topology(skeleton_data_file).node_ids
         anchor = EmptyLandmark(-1)
         self._landmarks = [anchor]
-        with open(skeleton_data_file) as handle:
-            csv_reader = csv.DictReader(handle, delimiter=",")
-            for row in csv_reader:
-                self._landmarks.append(EmptyLandmark(int(row["child"])))
+        for id in node_ids:
+            self._landmarks.append(EmptyLandmark(id))
+        self._index = _get_landmark_index((-1,) + node_ids)
+
+
+def _get_topology(skeleton_data_file) -> SkeletonTopology:
+    if isinstance(skeleton_data_file, SkeletonTopology):
+        return skeleton_data_file
+    return get_skeleton_topology(skeleton_data_file)
@@ -0,0 +1,122 @@
+// Client of /landmark_stream: draws actual and pattern skeletons on a canvas.
+// Every message is prefixed with uint32 length. The first one is a header with nodes and bones,
+// every next one is a record with two timestamps and two poses. Empty messages only keep connection alive.
+
+const LANDMARK_STREAM_ANCHOR = 0xFFFF;
+
+function float16ToNumber(bits) {
+    const sign = bits & 0x8000 ? -1 : 1;
+    const exponent = (bits >> 10) & 0x1F;
+    const fraction = bits & 0x03FF;
+    if (exponent === 0) {
+        return sign * Math.pow(2, -14) * (fraction / 1024);
+    }
+    if (exponent === 0x1F) {
+        return fraction ? NaN : sign * Infinity;
+    }
+    return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+}
+
+function parseLandmarkHeader(view) {
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== 'LMKS') {
+        throw new Error('Not a landmark stream');
+    }
+    const bytesPerValue = view.getUint8(5);
+    const nodeCount = view.getUint16(6, true);
+    const boneCount = view.getUint16(8, true);
+    let offset = 10 + 2 * nodeCount;
+    const bones = [];
+    for (let i = 0; i < boneCount; i++, offset += 4) {
+        bones.push([view.getUint16(offset, true), view.getUint16(offset + 2, true)]);
+    }
+    return {bytesPerValue, nodeCount, bones};
+}
+
+function parseLandmarkRecord(view, header) {
+    const readValue = header.bytesPerValue === 2
+        ? (offset) => float16ToNumber(view.getUint16(offset, true))
+        : (offset) => view.getFloat32(offset, true);
+    let offset = 16;
+    const readPose = () => {
+        const pose = [];
+        for (let node = 0; node < header.nodeCount; node++) {
+            pose.push([readValue(offset), readValue(offset + header.bytesPerValue)]);
+            offset += 3 * header.bytesPerValue;
+        }
+        return pose;
+    };
+    const timestamp = view.getFloat64(0, true);
+    const patternTimestamp = view.getFloat64(8, true);
+    const actual = readPose();
+    const pattern = readPose();
+    return {timestamp, patternTimestamp, actual, pattern};
+}
+
+function drawPose(context, pose, bones, color, scale, originX, originY) {
+    const point = (index) => index === LANDMARK_STREAM_ANCHOR ? [0, 0] : pose[index];
+    context.strokeStyle = color;
+    context.lineWidth = 3;
+    context.beginPath();
+    for (const [parent, child] of bones) {
+        const from = point(parent);
+        const to = point(child);
+        if (isNaN(from[0]) || isNaN(from[1]) || isNaN(to[0]) || isNaN(to[1])) {
+            continue;
+        }
+        context.moveTo(originX + from[0] * scale, originY + from[1] * scale);
+        context.lineTo(originX + to[0] * scale, originY + to[1] * scale);
+    }
+    context.stroke();
+}
+
+async function startLandmarkOverlay(canvas, url = '/landmark_stream', extent = 5) {
+    const context = canvas.getContext('2d');
+    const response = await fetch(url);
+    const reader = response.body.getReader();
+    let buffer = new Uint8Array(0);
+    let header = null;
+    let latest = null;
+
+    const draw = () => {
+        if (latest && header) {
+            const scale = Math.min(canvas.width, canvas.height) / (2 * extent);
+            context.clearRect(0, 0, canvas.width, canvas.height);
+            drawPose(context, latest.pattern, header.bones, '#b193be', scale, canvas.width / 2, canvas.height / 2);
+            drawPose(context, latest.actual, header.bones, '#ffffff', scale, canvas.width / 2, canvas.height / 2);
+            latest = null;
+        }
+        window.requestAnimationFrame(draw);
+    };
+    window.requestAnimationFrame(draw);
+
+    while (true) {
+        const {value, done} = await reader.read();
+        if (done) {
+            break;
+        }
+        const joined = new Uint8Array(buffer.length + value.length);
+        joined.set(buffer);
+        joined.set(value, buffer.length);
+        buffer = joined;
+
+        let offset = 0;
+        while (buffer.length - offset >= 4) {
+            const length = new DataView(buffer.buffer, offset, 4).getUint32(0, true);
+            if (buffer.length - offset - 4 < length) {
+                break;
+            }
+            if (length) {
+                const view = new DataView(buffer.buffer, offset + 4, length);
+                if (header) {
+                    // only the most recent pose is drawn in the next animation frame
+                    latest = parseLandmarkRecord(view, header);
+                } else {
+                    header = parseLandmarkHeader(view);
+                }
+            }
+            offset += 4 + length;
+        }
+        buffer = buffer.slice(offset);
+    }
+}